@@ -4,22 +4,107 @@ Handles individual client connections and message processing
 """
 
 import asyncio
-import struct
 import logging
-from typing import Dict, List, Optional, Set, Any
+from typing import Deque, Dict, List, Optional, Set, Tuple, Any
 from datetime import datetime
 import time
+from collections import defaultdict, deque
 
 from ..protocol.encoder import MessageEncoder
-from ..protocol.decoder import MessageDecoder
+from ..protocol.decoder import (
+    MessageDecoder, ContractMsg, EmptyMsg, StartApiMsg, ReqIdsMsg, ReqAcctDataMsg,
+    ReqMktDataMsg, CancelMktDataMsg, PlaceOrderMsg, CancelOrderMsg,
+    ReqContractDetailsMsg, ReqSecDefOptParamsMsg, ReqExecutionsMsg,
+    ReqHistoricalDataMsg
+)
+from ..protocol.framing import LENGTH_PREFIX
 from ..protocol.message_ids import IncomingMessageIds, OutgoingMessageIds, ErrorCodes
 
 logger = logging.getLogger(__name__)
 
+# Largest frame accepted from a client unless configured otherwise
+_DEFAULT_MAX_MESSAGE_SIZE = 0xFFFFFF
+
+# Frames allowed in a client's outbound queue before senders wait for the
+# writer and market data updates are dropped, unless configured otherwise
+_DEFAULT_MAX_OUTBOUND_QUEUE = 10000
+
+# Position lists at least this long are encoded off the event loop
+_EXECUTOR_ENCODE_THRESHOLD = 1000
+
+# Market data update key -> (tick type, is price tick), in send order
+_MARKET_DATA_TICKS = (
+    ('bid', 1, True),
+    ('ask', 2, True),
+    ('last', 4, True),
+    ('bid_size', 0, False),
+    ('ask_size', 3, False),
+    ('volume', 8, False),
+)
+
+
+class Subscription:
+    """Market data subscription state for one request ID"""
+    
+    __slots__ = ('contract', 'generic_ticks', 'snapshot', 'regulatory_snapshot',
+                 'symbol', 'templates')
+    
+    def __init__(self, contract: ContractMsg, generic_ticks: str, snapshot: bool,
+                 regulatory_snapshot: bool,
+                 templates: List[Tuple[str, Tuple[bytes, bytes]]]):
+        self.contract = contract
+        self.generic_ticks = generic_ticks
+        self.snapshot = snapshot
+        self.regulatory_snapshot = regulatory_snapshot
+        self.symbol = contract.symbol
+        self.templates = templates  # (update key, pre-encoded tick) pairs
+
+
+def _scan_frames(buf, offset: int, max_size: int = _DEFAULT_MAX_MESSAGE_SIZE):
+    """Find all complete length-prefixed frames in buf starting at offset
+    
+    Returns (new_offset, [(start, end), ...]) where each (start, end) pair
+    spans one whole frame including its 4-byte length prefix. Raises
+    ValueError if a frame declares a length above max_size.
+    """
+    unpack_from = LENGTH_PREFIX.unpack_from
+    end = len(buf)
+    frames = []
+    while end - offset >= 4:
+        length = unpack_from(buf, offset)[0]
+        if length > max_size:
+            raise ValueError(f"message length {length} exceeds limit of {max_size} bytes")
+        msg_end = offset + 4 + length
+        if msg_end > end:
+            # Incomplete message
+            break
+        frames.append((offset, msg_end))
+        offset = msg_end
+    return offset, frames
+
 
 class ClientHandler:
     """Handles individual IB API client connections"""
     
+    # Incoming message ID -> handler method name
+    _ROUTE_NAMES = {
+        IncomingMessageIds.START_API: '_handle_start_api',
+        IncomingMessageIds.REQ_IDS: '_handle_req_ids',
+        IncomingMessageIds.REQ_MANAGED_ACCTS: '_handle_req_managed_accounts',
+        IncomingMessageIds.REQ_ACCT_DATA: '_handle_req_account_data',
+        IncomingMessageIds.REQ_POSITIONS: '_handle_req_positions',
+        IncomingMessageIds.REQ_MKT_DATA: '_handle_req_market_data',
+        IncomingMessageIds.CANCEL_MKT_DATA: '_handle_cancel_market_data',
+        IncomingMessageIds.PLACE_ORDER: '_handle_place_order',
+        IncomingMessageIds.CANCEL_ORDER: '_handle_cancel_order',
+        IncomingMessageIds.REQ_OPEN_ORDERS: '_handle_req_open_orders',
+        IncomingMessageIds.REQ_CONTRACT_DATA: '_handle_req_contract_details',
+        IncomingMessageIds.REQ_SEC_DEF_OPT_PARAMS: '_handle_req_option_params',
+        IncomingMessageIds.REQ_CURRENT_TIME: '_handle_req_current_time',
+        IncomingMessageIds.REQ_EXECUTIONS: '_handle_req_executions',
+        IncomingMessageIds.REQ_HISTORICAL_DATA: '_handle_req_historical_data',
+    }
+    
     def __init__(self, client_id: int, reader: asyncio.StreamReader,
                  writer: asyncio.StreamWriter, server, config: Dict):
         self.client_id = client_id
@@ -32,11 +117,28 @@ class ClientHandler:
         self.encoder = MessageEncoder(config['protocol']['encoding'])
         self.decoder = MessageDecoder(config['protocol']['encoding'])
         
+        # Encoder methods used on hot send paths, bound once per connection
+        encoder = self.encoder
+        self._enc_tick_price = encoder.tick_price
+        self._enc_tick_size = encoder.tick_size
+        self._enc_fill_encoded = encoder.fill_encoded
+        self._enc_order_status = encoder.order_status
+        self._enc_fill_order_status = encoder.fill_order_status
+        self._enc_error = encoder.error_message
+        self._enc_portfolio_value = encoder.portfolio_value
+        self._enc_position_data = encoder.position_data
+        
+        # Bound handlers, resolved once per connection
+        self._routes = {
+            msg_id: getattr(self, name) for msg_id, name in self._ROUTE_NAMES.items()
+        }
+        
         # Connection state
         self.api_connected = False
         self.server_version = config['protocol']['version']
         self.client_version = None
         self.connection_time = datetime.now()
+        self._handshake_ts = self.connection_time.strftime('%Y%m%d %H:%M:%S')
         
         # Authentication state
         self.authenticated = False
@@ -44,51 +146,97 @@ class ClientHandler:
         self.username = None
         
         # Subscriptions
-        self.market_data_subscriptions: Dict[int, Dict] = {}  # req_id -> subscription info
+        self.market_data_subscriptions: Dict[int, Subscription] = {}  # req_id -> subscription
+        self._subs_by_symbol: Dict[str, Dict[int, Subscription]] = defaultdict(dict)  # symbol -> req_id -> subscription
         self.account_subscriptions: Set[str] = set()
         self.position_subscriptions: Set[str] = set()
         
+        # Configured accounts never change at runtime, so encode them once
+        accounts = config['authentication']['accounts']
+        self._primary_account_id = accounts[0]['account_id']
+        self._managed_accounts_frame = self.encoder.managed_accounts(
+            ','.join(acc['account_id'] for acc in accounts)
+        )
+        
         # Order management
         self.next_order_id = None
-        
-        # Rate limiting
-        self.last_message_time = time.time()
-        self.message_count = 0
+        self._order_ack_delay = config['simulation'].get('order_ack_delay', 0.0)
+        self._pending_order_status: Dict[int, Tuple[asyncio.TimerHandle, bytes]] = {}
+        self._order_status_templates: Dict[Tuple[str, int], Tuple[bytes, bytes, bytes]] = {}
+        
+        # Outbound queue, flushed by the writer task started in handle().
+        # Past the high-water mark senders wait for _out_space, which the
+        # writer sets again once the client has drained the backlog.
+        self._outq: Deque[bytes] = deque()
+        self._out_event = asyncio.Event()
+        self._out_space = asyncio.Event()
+        self._out_space.set()
+        self._max_outq = config['protocol'].get('max_outbound_queue', _DEFAULT_MAX_OUTBOUND_QUEUE)
+        self._dropped_market_data = 0
+        self._writer_task: Optional[asyncio.Task] = None
+        
+        # Rate limiting (token bucket refilled once per window)
         self.rate_limit_window = 1.0  # 1 second window
+        self._max_rate = config['protocol']['message_rate_limit']
+        self._rate_tokens = self._max_rate
+        self._rate_reset_at = time.monotonic() + self.rate_limit_window
         
         logger.info(f"Client handler created for client {client_id}")
     
     async def handle(self):
         """Main client handling loop"""
+        # All outbound frames go through a single writer task
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        
         try:
             # IB protocol starts with version exchange
             await self._handle_initial_handshake()
             
             # Message processing loop
-            buffer = b''
+            buffer_size = self.config['server']['buffer_size']
+            max_size = self.config['protocol'].get('max_message_size', _DEFAULT_MAX_MESSAGE_SIZE)
+            buf = bytearray()
+            read_offset = 0
             while True:
                 # Read data from client
-                data = await self.reader.read(self.config['server']['buffer_size'])
+                data = await self.reader.read(buffer_size)
                 if not data:
                     break
                 
-                buffer += data
+                if read_offset == len(buf):
+                    # Nothing pending: frame straight over the chunk just read
+                    # so complete messages are never copied into buf
+                    buf.clear()
+                    src, read_offset = data, 0
+                else:
+                    buf += data
+                    src = buf
+                
+                # Locate every complete message in one pass, advancing an
+                # offset instead of re-slicing the buffer after each one
+                try:
+                    read_offset, frames = _scan_frames(src, read_offset, max_size)
+                except ValueError as e:
+                    # The stream cannot be resynchronised without buffering
+                    # the oversized frame, so drop the connection instead
+                    logger.warning(f"Client {self.client_id} sent an oversized message: {e}")
+                    break
+                
+                # Hand the decoder zero-copy views; the with block releases
+                # them before buf is resized below
+                with memoryview(src) as view:
+                    for start, end in frames:
+                        # Process message
+                        await self._process_message(view[start:end])
                 
-                # Process complete messages
-                while len(buffer) >= 4:
-                    # Check message length
-                    msg_length = struct.unpack('>I', buffer[:4])[0]
-                    
-                    if len(buffer) < 4 + msg_length:
-                        # Incomplete message
-                        break
-                    
-                    # Extract complete message
-                    message_data = buffer[:4 + msg_length]
-                    buffer = buffer[4 + msg_length:]
-                    
-                    # Process message
-                    await self._process_message(message_data)
+                if src is data:
+                    # Keep only the incomplete tail of the chunk
+                    buf += memoryview(data)[read_offset:]
+                    read_offset = 0
+                elif read_offset and read_offset * 2 >= len(buf):
+                    # Compact consumed bytes once they make up most of the buffer
+                    del buf[:read_offset]
+                    read_offset = 0
         
         except asyncio.CancelledError:
             logger.info(f"Client {self.client_id} handler cancelled")
@@ -107,39 +255,40 @@ class ClientHandler:
             
             # IB sends "API\0" prefix followed by version
             if data.startswith(b'API\x00'):
-                # Extract version info
-                parts = data.split(b'\x00')
-                if len(parts) >= 2:
-                    try:
-                        # Parse client version - it might be 'v' + version or just version
-                        version_str = parts[1].decode('latin-1')
-                        if version_str.startswith('v'):
-                            version_str = version_str[1:]
-                        
-                        # Handle version range like "100..176"
-                        if '..' in version_str:
-                            min_ver, max_ver = version_str.split('..')
-                            self.client_version = int(max_ver)
-                        else:
-                            self.client_version = int(version_str)
-                    except:
-                        self.client_version = 100  # Default fallback
+                # Extract version info - everything up to the next null
+                end = data.find(b'\x00', 4)
+                version = data[4:end] if end >= 0 else data[4:]
+                
+                # Parse client version - it might be 'v' + version or just version
+                if version[:1] == b'v':
+                    version = version[1:]
+                
+                # Handle version range like "100..176"
+                sep = version.find(b'..')
+                if sep >= 0:
+                    version = version[sep + 2:]
+                
+                try:
+                    self.client_version = int(version)
+                except ValueError:
+                    self.client_version = 100  # Default fallback
             
             # Send server version
             await self._send_raw(self.encoder.server_version(
                 self.server_version,
-                self.connection_time.strftime('%Y%m%d %H:%M:%S')
+                self._handshake_ts
             ))
             
             # Mark as connected
             self.api_connected = True
-            logger.info(f"Client {self.client_id} handshake complete - Client version: {self.client_version}")
+            logger.info("Client %s handshake complete - Client version: %s",
+                        self.client_id, self.client_version)
             
         except Exception as e:
             logger.error(f"Handshake failed for client {self.client_id}: {e}")
             raise
     
-    async def _process_message(self, data: bytes):
+    async def _process_message(self, data: memoryview):
         """Process a complete message from client"""
         try:
             # Check rate limit
@@ -155,7 +304,9 @@ class ClientHandler:
                 logger.warning(f"Failed to decode message from client {self.client_id}")
                 return
             
-            logger.debug(f"Client {self.client_id} - Message ID: {msg_id}, Fields: {fields[:5]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Client %s - Message ID: %s, Fields: %s...",
+                             self.client_id, msg_id, fields[:5])
             
             # Route to appropriate handler
             await self._route_message(msg_id, fields)
@@ -166,42 +317,24 @@ class ClientHandler:
     
     def _check_rate_limit(self) -> bool:
         """Check if client is within rate limits"""
-        current_time = time.time()
+        now = time.monotonic()
         
-        # Reset window if needed
-        if current_time - self.last_message_time > self.rate_limit_window:
-            self.message_count = 0
-            self.last_message_time = current_time
+        # Refill the bucket once the window has elapsed
+        if now >= self._rate_reset_at:
+            self._rate_tokens = self._max_rate
+            self._rate_reset_at = now + self.rate_limit_window
         
-        self.message_count += 1
-        
-        # Check limit
-        max_rate = self.config['protocol']['message_rate_limit']
-        return self.message_count <= max_rate
+        self._rate_tokens -= 1
+        return self._rate_tokens >= 0
     
     async def _route_message(self, msg_id: int, fields: List[str]):
         """Route message to appropriate handler"""
-        handlers = {
-            IncomingMessageIds.START_API: self._handle_start_api,
-            IncomingMessageIds.REQ_IDS: self._handle_req_ids,
-            IncomingMessageIds.REQ_MANAGED_ACCTS: self._handle_req_managed_accounts,
-            IncomingMessageIds.REQ_ACCT_DATA: self._handle_req_account_data,
-            IncomingMessageIds.REQ_POSITIONS: self._handle_req_positions,
-            IncomingMessageIds.REQ_MKT_DATA: self._handle_req_market_data,
-            IncomingMessageIds.CANCEL_MKT_DATA: self._handle_cancel_market_data,
-            IncomingMessageIds.PLACE_ORDER: self._handle_place_order,
-            IncomingMessageIds.CANCEL_ORDER: self._handle_cancel_order,
-            IncomingMessageIds.REQ_OPEN_ORDERS: self._handle_req_open_orders,
-            IncomingMessageIds.REQ_CONTRACT_DATA: self._handle_req_contract_details,
-            IncomingMessageIds.REQ_SEC_DEF_OPT_PARAMS: self._handle_req_option_params,
-            IncomingMessageIds.REQ_CURRENT_TIME: self._handle_req_current_time,
-            IncomingMessageIds.REQ_EXECUTIONS: self._handle_req_executions,
-            IncomingMessageIds.REQ_HISTORICAL_DATA: self._handle_req_historical_data,
-        }
-        
-        handler = handlers.get(msg_id)
+        handler = self._routes.get(msg_id)
         if handler:
             parsed_data = self.decoder.parse_message(msg_id, fields)
+            if parsed_data is None:
+                # Parse failures are logged by the decoder
+                return
             await handler(parsed_data)
         else:
             logger.warning(f"No handler for message ID {msg_id}")
@@ -209,34 +342,34 @@ class ClientHandler:
                                  f"Unknown message ID: {msg_id}")
     
     # Message handlers
-    async def _handle_start_api(self, data: Dict):
+    async def _handle_start_api(self, data: StartApiMsg):
         """Handle START_API message"""
-        logger.info(f"Client {self.client_id} START_API: {data}")
+        logger.info("Client %s START_API: %s", self.client_id, data)
         
         # Set client ID if provided
-        if data.get('client_id') is not None:
-            self.client_id = data['client_id']
+        if data.client_id is not None:
+            self.client_id = data.client_id
         
         # Send initial connection messages
         await self._send_next_valid_id()
         await self._send_managed_accounts()
     
-    async def _handle_req_ids(self, data: Dict):
+    async def _handle_req_ids(self, data: ReqIdsMsg):
         """Handle request for next valid order ID"""
         await self._send_next_valid_id()
     
-    async def _handle_req_managed_accounts(self, data: Dict):
+    async def _handle_req_managed_accounts(self, data: EmptyMsg):
         """Handle request for managed accounts"""
         await self._send_managed_accounts()
     
-    async def _handle_req_account_data(self, data: Dict):
+    async def _handle_req_account_data(self, data: ReqAcctDataMsg):
         """Handle request for account data"""
-        account_code = data.get('account_code', '')
-        subscribe = data.get('subscribe', True)
+        account_code = data.account_code
+        subscribe = data.subscribe
         
         # For simulator, use the configured test account
         if not account_code:
-            account_code = self.config['authentication']['accounts'][0]['account_id']
+            account_code = self._primary_account_id
         
         if subscribe:
             self.account_subscriptions.add(account_code)
@@ -245,82 +378,89 @@ class ClientHandler:
             self.account_subscriptions.discard(account_code)
             await self._send_account_download_end(account_code)
     
-    async def _handle_req_positions(self, data: Dict):
+    async def _handle_req_positions(self, data: EmptyMsg):
         """Handle request for positions"""
         # Get first configured account
-        account_id = self.config['authentication']['accounts'][0]['account_id']
+        account_id = self._primary_account_id
         
         # Send positions from database
         positions = self.server.db_manager.get_positions(account_id)
         
-        for position in positions:
-            await self._send_position_data(account_id, position)
+        frames = await self._encode_positions(
+            self._encode_position_data, account_id, positions
+        )
         
         # Send end marker
-        await self._send_raw(self.encoder.position_end())
+        frames.append(self.encoder.position_end())
+        await self._send_many(frames)
     
-    async def _handle_req_market_data(self, data: Dict):
+    async def _handle_req_market_data(self, data: ReqMktDataMsg):
         """Handle market data subscription request"""
-        req_id = data.get('req_id', -1)
-        contract = data.get('contract', {})
+        req_id = data.req_id
+        contract = data.contract
+        
+        # Replace any previous subscription using the same request ID
+        self._unindex_subscription(req_id)
         
         # Store subscription
-        self.market_data_subscriptions[req_id] = {
-            'contract': contract,
-            'generic_ticks': data.get('generic_tick_list', ''),
-            'snapshot': data.get('snapshot', False),
-            'regulatory_snapshot': data.get('regulatory_snapshot', False)
-        }
+        sub = Subscription(
+            contract=contract,
+            generic_ticks=data.generic_tick_list,
+            snapshot=data.snapshot,
+            regulatory_snapshot=data.regulatory_snapshot,
+            templates=self._build_tick_templates(req_id)
+        )
+        self.market_data_subscriptions[req_id] = sub
+        self._subs_by_symbol[sub.symbol][req_id] = sub
         
         # Send initial market data
         await self._send_initial_market_data(req_id, contract)
     
-    async def _handle_cancel_market_data(self, data: Dict):
+    async def _handle_cancel_market_data(self, data: CancelMktDataMsg):
         """Handle cancel market data request"""
-        req_id = data.get('req_id', -1)
+        req_id = data.req_id
         
         if req_id in self.market_data_subscriptions:
+            self._unindex_subscription(req_id)
             del self.market_data_subscriptions[req_id]
             logger.info(f"Cancelled market data subscription {req_id}")
     
-    async def _handle_place_order(self, data: Dict):
+    async def _handle_place_order(self, data: PlaceOrderMsg):
         """Handle place order request"""
         order_data = {
-            'account_id': self.config['authentication']['accounts'][0]['account_id'],
+            'account_id': self._primary_account_id,
             'client_id': self.client_id,
-            'con_id': data['contract'].get('con_id', 0),
-            'symbol': data['contract']['symbol'],
-            'security_type': data['contract']['sec_type'],
-            'action': data['order']['action'],
-            'order_type': data['order']['order_type'],
-            'quantity': data['order']['total_quantity'],
-            'limit_price': data['order'].get('limit_price'),
-            'aux_price': data['order'].get('aux_price'),
-            'time_in_force': data['order'].get('tif', 'DAY')
+            'con_id': data.contract.con_id,
+            'symbol': data.contract.symbol,
+            'security_type': data.contract.sec_type,
+            'action': data.order.action,
+            'order_type': data.order.order_type,
+            'quantity': data.order.total_quantity,
+            'limit_price': data.order.limit_price,
+            'aux_price': data.order.aux_price,
+            'time_in_force': data.order.tif
         }
         
         # Create order in database
-        order_id = data['order_id']
+        order_id = data.order_id
         
         # Send order status updates
-        await self._send_order_status(order_id, 'PendingSubmit', 0, 0, 0)
-        await asyncio.sleep(0.1)  # Simulate processing
-        await self._send_order_status(order_id, 'Submitted', 0, 0, 0)
+        await self._send_unfilled_order_status(order_id, 'PendingSubmit')
+        await self._send_delayed_order_status(order_id, 'Submitted')  # Simulate processing
         
         # TODO: Implement order execution logic
     
-    async def _handle_cancel_order(self, data: Dict):
+    async def _handle_cancel_order(self, data: CancelOrderMsg):
         """Handle cancel order request"""
-        order_id = data.get('order_id', -1)
+        order_id = data.order_id
         
         # Send cancellation status
-        await self._send_order_status(order_id, 'PendingCancel', 0, 0, 0)
-        await asyncio.sleep(0.1)
-        await self._send_order_status(order_id, 'Cancelled', 0, 0, 0)
+        await self._send_unfilled_order_status(order_id, 'PendingCancel')
+        await self._send_delayed_order_status(order_id, 'Cancelled')
     
-    async def _handle_req_open_orders(self, data: Dict):
+    async def _handle_req_open_orders(self, data: EmptyMsg):
         """Handle request for open orders"""
-        account_id = self.config['authentication']['accounts'][0]['account_id']
+        account_id = self._primary_account_id
         
         # Get open orders from database
         orders = self.server.db_manager.get_open_orders(account_id)
@@ -333,16 +473,16 @@ class ClientHandler:
         # Send end marker
         await self._send_raw(self.encoder.open_order_end())
     
-    async def _handle_req_contract_details(self, data: Dict):
+    async def _handle_req_contract_details(self, data: ReqContractDetailsMsg):
         """Handle request for contract details"""
-        req_id = data.get('req_id', -1)
-        contract = data.get('contract', {})
+        req_id = data.req_id
+        contract = data.contract
         
         # For simulator, return simple contract details
-        if contract.get('symbol'):
+        if contract.symbol:
             contract_info = self.server.db_manager.get_contract_by_symbol(
-                contract['symbol'], 
-                contract.get('sec_type', 'STK')
+                contract.symbol, 
+                contract.sec_type
             )
             
             if contract_info:
@@ -352,10 +492,10 @@ class ClientHandler:
         # Send end marker
         await self._send_raw(self.encoder.contract_data_end(req_id))
     
-    async def _handle_req_option_params(self, data: Dict):
+    async def _handle_req_option_params(self, data: ReqSecDefOptParamsMsg):
         """Handle request for option chain parameters"""
-        req_id = data.get('req_id', -1)
-        underlying_symbol = data.get('underlying_symbol', '')
+        req_id = data.req_id
+        underlying_symbol = data.underlying_symbol
         
         # For simulator, generate sample option chain
         # TODO: Implement full option chain generation
@@ -363,28 +503,29 @@ class ClientHandler:
         # Send end marker
         await self._send_raw(self.encoder.security_definition_option_parameter_end(req_id))
     
-    async def _handle_req_current_time(self, data: Dict):
+    async def _handle_req_current_time(self, data: EmptyMsg):
         """Handle request for current server time"""
         current_time = int(time.time())
         await self._send_raw(self.encoder.current_time(current_time))
     
-    async def _handle_req_executions(self, data: Dict):
+    async def _handle_req_executions(self, data: ReqExecutionsMsg):
         """Handle request for executions"""
-        req_id = data.get('req_id', -1)
+        req_id = data.req_id
         
         # TODO: Implement execution filtering and retrieval
         
         # Send end marker
         await self._send_raw(self.encoder.execution_data_end(req_id))
     
-    async def _handle_req_historical_data(self, data: Dict):
+    async def _handle_req_historical_data(self, data: ReqHistoricalDataMsg):
         """Handle request for historical data"""
-        req_id = data.get('req_id', -1)
+        req_id = data.req_id
         
         # TODO: Implement historical data generation
         
-        # For now, send empty result
-        await self._send_raw(self.encoder.historical_data(
+        # For now, send empty result; queued as separate parts so writelines
+        # gathers them without first copying the payload behind a length prefix
+        await self._send_many(self.encoder.historical_data_parts(
             req_id, '', '', 0, []
         ))
     
@@ -396,59 +537,73 @@ class ClientHandler:
     
     async def _send_managed_accounts(self):
         """Send list of managed accounts"""
-        # Get configured accounts
-        accounts = [acc['account_id'] for acc in self.config['authentication']['accounts']]
-        accounts_str = ','.join(accounts)
-        await self._send_raw(self.encoder.managed_accounts(accounts_str))
+        await self._send_raw(self._managed_accounts_frame)
     
     async def _send_account_updates(self, account_id: str):
         """Send account value updates"""
         account_data = self.server.db_manager.get_account_summary(account_id)
+        frames = []
         
         if account_data:
             # Send various account values
             currency = account_data.get('base_currency', 'USD')
+            now = time.localtime()
             
-            await self._send_raw(self.encoder.account_value(
-                'NetLiquidation', str(account_data['net_liquidation']), 
-                currency, account_id
-            ))
-            
-            await self._send_raw(self.encoder.account_value(
-                'TotalCashValue', str(account_data['cash_balance']), 
-                currency, account_id
-            ))
-            
-            await self._send_raw(self.encoder.account_value(
-                'UnrealizedPnL', str(account_data['unrealized_pnl']), 
-                currency, account_id
-            ))
-            
-            await self._send_raw(self.encoder.account_value(
-                'RealizedPnL', str(account_data['realized_pnl']), 
-                currency, account_id
-            ))
-            
-            # Send timestamp
-            await self._send_raw(self.encoder.account_update_time(
-                datetime.now().strftime('%H:%M:%S')
-            ))
+            frames.extend([
+                self.encoder.account_value(
+                    'NetLiquidation', str(account_data['net_liquidation']),
+                    currency, account_id
+                ),
+                self.encoder.account_value(
+                    'TotalCashValue', str(account_data['cash_balance']),
+                    currency, account_id
+                ),
+                self.encoder.account_value(
+                    'UnrealizedPnL', str(account_data['unrealized_pnl']),
+                    currency, account_id
+                ),
+                self.encoder.account_value(
+                    'RealizedPnL', str(account_data['realized_pnl']),
+                    currency, account_id
+                ),
+                # Send timestamp
+                self.encoder.account_update_time(
+                    f"{now.tm_hour:02d}:{now.tm_min:02d}:{now.tm_sec:02d}"
+                ),
+            ])
         
         # Send portfolio positions
         positions = self.server.db_manager.get_positions(account_id)
-        for position in positions:
-            await self._send_portfolio_position(account_id, position)
+        frames.extend(await self._encode_positions(
+            self._encode_portfolio_position, account_id, positions
+        ))
         
-        # Send end marker
-        await self._send_account_download_end(account_id)
+        # Send end marker, all in a single write
+        frames.append(self.encoder.account_download_end(account_id))
+        await self._send_many(frames)
     
     async def _send_account_download_end(self, account_id: str):
         """Send account download end marker"""
         await self._send_raw(self.encoder.account_download_end(account_id))
     
-    async def _send_portfolio_position(self, account_id: str, position: Dict):
-        """Send portfolio position update"""
-        await self._send_raw(self.encoder.portfolio_value(
+    async def _encode_positions(self, encode, account_id: str,
+                                positions: List[Dict]) -> List[bytes]:
+        """Encode one message per position
+        
+        Large portfolios are encoded in the default executor so a single
+        request cannot stall every other client on the event loop.
+        """
+        if len(positions) < _EXECUTOR_ENCODE_THRESHOLD:
+            return [encode(account_id, position) for position in positions]
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: [encode(account_id, position) for position in positions]
+        )
+    
+    def _encode_portfolio_position(self, account_id: str, position: Dict) -> bytes:
+        """Encode portfolio position update"""
+        return self._enc_portfolio_value(
             position['con_id'],
             position['symbol'],
             position['security_type'],
@@ -467,11 +622,11 @@ class ClientHandler:
             position['unrealized_pnl'],
             position['realized_pnl'],
             account_id
-        ))
+        )
     
-    async def _send_position_data(self, account_id: str, position: Dict):
-        """Send position data"""
-        await self._send_raw(self.encoder.position_data(
+    def _encode_position_data(self, account_id: str, position: Dict) -> bytes:
+        """Encode position data"""
+        return self._enc_position_data(
             account_id,
             position['con_id'],
             position['symbol'],
@@ -486,24 +641,26 @@ class ClientHandler:
             position['symbol'],  # trading class
             position['position'],
             position['avg_cost']
-        ))
+        )
     
-    async def _send_initial_market_data(self, req_id: int, contract: Dict):
+    async def _send_initial_market_data(self, req_id: int, contract: ContractMsg):
         """Send initial market data for a contract"""
-        symbol = contract.get('symbol', '')
+        symbol = contract.symbol
         
         # Generate sample market data
         base_price = 100.0  # TODO: Get from database or market simulator
         
         # Send various tick types
-        await self._send_raw(self.encoder.tick_price(req_id, 1, base_price - 0.01))  # Bid
-        await self._send_raw(self.encoder.tick_price(req_id, 2, base_price + 0.01))  # Ask
-        await self._send_raw(self.encoder.tick_price(req_id, 4, base_price))         # Last
-        
-        await self._send_raw(self.encoder.tick_size(req_id, 0, 100))  # Bid size
-        await self._send_raw(self.encoder.tick_size(req_id, 3, 100))  # Ask size
-        await self._send_raw(self.encoder.tick_size(req_id, 5, 50))   # Last size
-        await self._send_raw(self.encoder.tick_size(req_id, 8, 1000000))  # Volume
+        await self._send_many([
+            self._enc_tick_price(req_id, 1, base_price - 0.01),  # Bid
+            self._enc_tick_price(req_id, 2, base_price + 0.01),  # Ask
+            self._enc_tick_price(req_id, 4, base_price),         # Last
+            
+            self._enc_tick_size(req_id, 0, 100),      # Bid size
+            self._enc_tick_size(req_id, 3, 100),      # Ask size
+            self._enc_tick_size(req_id, 5, 50),       # Last size
+            self._enc_tick_size(req_id, 8, 1000000),  # Volume
+        ])
     
     async def _send_contract_details(self, req_id: int, contract_info: Dict):
         """Send contract details"""
@@ -548,10 +705,10 @@ class ClientHandler:
             ''     # stock type
         ))
     
-    async def _send_order_status(self, order_id: int, status: str, 
-                                filled: float, remaining: float, avg_fill_price: float):
-        """Send order status update"""
-        await self._send_raw(self.encoder.order_status(
+    def _encode_order_status(self, order_id: int, status: str,
+                             filled: float, remaining: float, avg_fill_price: float) -> bytes:
+        """Encode order status update"""
+        return self._enc_order_status(
             order_id, status, filled, remaining, avg_fill_price,
             order_id + 1000,  # perm_id
             0,  # parent_id
@@ -559,51 +716,202 @@ class ClientHandler:
             self.client_id,
             '',  # why_held
             0    # mkt_cap_price
+        )
+    
+    async def _send_order_status(self, order_id: int, status: str, 
+                                filled: float, remaining: float, avg_fill_price: float):
+        """Send order status update"""
+        await self._send_raw(self._encode_order_status(
+            order_id, status, filled, remaining, avg_fill_price
         ))
     
+    def _encode_unfilled_order_status(self, order_id: int, status: str) -> bytes:
+        """Encode an order status with no fills from a cached per-status template"""
+        key = (status, self.client_id)
+        template = self._order_status_templates.get(key)
+        if template is None:
+            template = self.encoder.order_status_template(status, self.client_id)
+            self._order_status_templates[key] = template
+        return self._enc_fill_order_status(template, order_id, order_id + 1000)
+    
+    async def _send_unfilled_order_status(self, order_id: int, status: str):
+        """Send order status update for an order with no fills"""
+        await self._flush_pending_order_status(order_id)
+        await self._send_raw(self._encode_unfilled_order_status(order_id, status))
+    
+    async def _flush_pending_order_status(self, order_id: int):
+        """Send a delayed status for the order now, ahead of a newer one"""
+        pending = self._pending_order_status.pop(order_id, None)
+        if pending is not None:
+            timer, frame = pending
+            timer.cancel()
+            await self._send_raw(frame)
+    
+    async def _send_delayed_order_status(self, order_id: int, status: str):
+        """Send an order status transition after the configured ack delay
+        
+        The follow-up status fires from a loop timer, so the handler returns
+        immediately instead of holding the client's message loop. A status
+        still pending for the same order is sent first, so none are skipped.
+        """
+        frame = self._encode_unfilled_order_status(order_id, status)
+        await self._flush_pending_order_status(order_id)
+        
+        if self._order_ack_delay <= 0:
+            await self._send_raw(frame)
+            return
+        
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(
+            self._order_ack_delay, self._deliver_order_status, order_id, frame
+        )
+        self._pending_order_status[order_id] = (timer, frame)
+    
+    def _deliver_order_status(self, order_id: int, frame: bytes):
+        """Timer callback writing a delayed order status"""
+        self._pending_order_status.pop(order_id, None)
+        self._enqueue(frame)
+    
     async def _send_error(self, req_id: int, error_code: int, error_msg: str):
         """Send error message to client"""
-        await self._send_raw(self.encoder.error_message(req_id, error_code, error_msg))
+        await self._send_raw(self._enc_error(req_id, error_code, error_msg))
+    
+    def _enqueue(self, data: bytes):
+        """Queue encoded data for the writer task"""
+        self._outq.append(data)
+        self._out_event.set()
+        if len(self._outq) >= self._max_outq:
+            self._out_space.clear()
+    
+    def _enqueue_many(self, frames: List[bytes]):
+        """Queue several encoded messages for the same writer batch"""
+        if not frames:
+            return
+        self._outq.extend(frames)
+        self._out_event.set()
+        if len(self._outq) >= self._max_outq:
+            self._out_space.clear()
     
     async def _send_raw(self, data: bytes):
         """Send raw data to client"""
+        self._enqueue(data)
+        if not self._out_space.is_set():
+            await self._out_space.wait()
+    
+    async def _send_many(self, frames: List[bytes]):
+        """Send several encoded messages in the same writer batch"""
+        self._enqueue_many(frames)
+        if not self._out_space.is_set():
+            await self._out_space.wait()
+    
+    async def _writer_loop(self):
+        """Flush everything queued since the last wakeup with one writelines + drain"""
+        outq = self._outq
         try:
-            self.writer.write(data)
-            await self.writer.drain()
+            while True:
+                await self._out_event.wait()
+                self._out_event.clear()
+                if not outq:
+                    continue
+                
+                frames = list(outq)
+                outq.clear()
+                self.writer.writelines(frames)
+                await self.writer.drain()
+                
+                if len(outq) < self._max_outq:
+                    self._out_space.set()
+                    if self._dropped_market_data:
+                        logger.warning(f"Client {self.client_id} caught up after "
+                                       f"{self._dropped_market_data} market data frames were dropped")
+                        self._dropped_market_data = 0
         except Exception as e:
             logger.error(f"Failed to send data to client {self.client_id}: {e}")
-            raise
+            self.writer.close()
+        finally:
+            # Nothing will drain the queue any more; don't leave senders waiting
+            self._out_space.set()
+    
+    def _unindex_subscription(self, req_id: int):
+        """Remove a market data subscription from the symbol index"""
+        sub = self.market_data_subscriptions.get(req_id)
+        if sub is None:
+            return
+        
+        subs = self._subs_by_symbol.get(sub.symbol)
+        if subs is not None:
+            subs.pop(req_id, None)
+            if not subs:
+                del self._subs_by_symbol[sub.symbol]
+    
+    def _build_tick_templates(self, req_id: int) -> List[Tuple[str, Tuple[bytes, bytes]]]:
+        """Pre-encode the fixed part of every market data tick for a subscription"""
+        templates = []
+        for key, tick_type, is_price in _MARKET_DATA_TICKS:
+            if is_price:
+                template = self.encoder.tick_price_template(req_id, tick_type)
+            else:
+                template = self.encoder.tick_size_template(req_id, tick_type)
+            templates.append((key, template))
+        return templates
     
     def is_subscribed_to_symbol(self, symbol: str) -> bool:
         """Check if client is subscribed to symbol"""
-        for sub in self.market_data_subscriptions.values():
-            if sub['contract'].get('symbol') == symbol:
-                return True
-        return False
+        return bool(self._subs_by_symbol.get(symbol))
+    
+    def enqueue_market_data(self, symbol: str, fields: Dict[str, bytes]):
+        """Queue a market data update for symbol without waiting on the writer
+        
+        fields maps update keys to values already encoded as wire fields, so a
+        broadcast encodes each value once for every subscriber.
+        """
+        frames = []
+        fill_encoded = self._enc_fill_encoded
+        
+        # Only visit subscriptions for this symbol; each tick only needs its
+        # value spliced into the pre-encoded template
+        subs = self._subs_by_symbol.get(symbol)
+        if not subs:
+            return
+        
+        # A client that is not keeping up gets no new ticks until the writer
+        # has drained its backlog; later updates supersede the dropped ones
+        if not self._out_space.is_set():
+            self._dropped_market_data += sum(
+                1 for sub in subs.values() for key, _ in sub.templates if key in fields
+            )
+            return
+        
+        for sub in subs.values():
+            for key, template in sub.templates:
+                if key in fields:
+                    frames.append(fill_encoded(template, fields[key]))
+        
+        self._enqueue_many(frames)
     
     async def send_market_data(self, symbol: str, data: Dict):
         """Send market data update for symbol"""
-        # Find matching subscriptions
-        for req_id, sub in self.market_data_subscriptions.items():
-            if sub['contract'].get('symbol') == symbol:
-                # Send price updates
-                if 'bid' in data:
-                    await self._send_raw(self.encoder.tick_price(req_id, 1, data['bid']))
-                if 'ask' in data:
-                    await self._send_raw(self.encoder.tick_price(req_id, 2, data['ask']))
-                if 'last' in data:
-                    await self._send_raw(self.encoder.tick_price(req_id, 4, data['last']))
-                
-                # Send size updates
-                if 'bid_size' in data:
-                    await self._send_raw(self.encoder.tick_size(req_id, 0, data['bid_size']))
-                if 'ask_size' in data:
-                    await self._send_raw(self.encoder.tick_size(req_id, 3, data['ask_size']))
-                if 'volume' in data:
-                    await self._send_raw(self.encoder.tick_size(req_id, 8, data['volume']))
+        self.enqueue_market_data(symbol, self.encoder.encode_field_map(data))
     
     async def close(self):
         """Close client connection"""
+        for timer, _ in self._pending_order_status.values():
+            timer.cancel()
+        self._pending_order_status.clear()
+        
+        # Stop the writer task and hand anything still queued to the transport
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        
+        if self._outq and not self.writer.is_closing():
+            self.writer.writelines(self._outq)
+        self._outq.clear()
+        
         try:
             self.writer.close()
             await self.writer.wait_closed()
@@ -4,11 +4,12 @@ Main server that listens for IB API client connections
 """
 
 import asyncio
+import copy
+import itertools
 import logging
-import struct
 import os
+from collections import OrderedDict
 from typing import Dict, List, Optional
-from datetime import datetime
 import yaml
 
 from ..protocol.encoder import MessageEncoder
@@ -19,6 +20,10 @@ from .client_handler import ClientHandler
 
 logger = logging.getLogger(__name__)
 
+# Parsed config files: absolute path -> (mtime_ns, size, config), least recently used first
+_CONFIG_CACHE: 'OrderedDict[str, tuple]' = OrderedDict()
+_CONFIG_CACHE_MAX = 32
+
 
 class IBSimulatorServer:
     """Main TCP server for IB API simulator"""
@@ -34,13 +39,20 @@ class IBSimulatorServer:
         self.host = self._get_host_from_config(env)
         self.port = self._get_port_from_config(env)
         self.max_clients = self.config['server']['max_clients']
+        self.reuse_port = self.config['server'].get('reuse_port', False)
         
-        # Client management
-        self.clients: Dict[int, ClientHandler] = {}
-        self.next_client_id = 1
+        # Client management: one slot per allowed connection, with bit i of
+        # _active set while slot i is in use. Client IDs are slot + 1.
+        self._client_slots: List[Optional[ClientHandler]] = [None] * self.max_clients
+        self._active = 0
+        self._full_mask = (1 << self.max_clients) - 1
         self.server = None
         self.running = False
         
+        # Order IDs handed out to clients; strictly increasing
+        self._order_id_base = 1_000_000
+        self._order_id_seq = itertools.count(1)
+        
         # Market data manager (to be implemented)
         self.market_data_manager = None
         
@@ -51,14 +63,34 @@ class IBSimulatorServer:
         if config_path is None:
             config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
         
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = copy.deepcopy(self._read_config_file(config_path))
         
         # Apply environment variable overrides
         self._apply_env_overrides(config)
         
         return config
     
+    @staticmethod
+    def _read_config_file(config_path: str) -> Dict:
+        """Parse a config file, reusing the cached result while it is unchanged"""
+        path = os.path.abspath(config_path)
+        st = os.stat(path)
+        
+        cached = _CONFIG_CACHE.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _CONFIG_CACHE.move_to_end(path)
+            return cached[2]
+        
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f)
+        
+        _CONFIG_CACHE[path] = (st.st_mtime_ns, st.st_size, config)
+        _CONFIG_CACHE.move_to_end(path)
+        if len(_CONFIG_CACHE) > _CONFIG_CACHE_MAX:
+            _CONFIG_CACHE.popitem(last=False)
+        
+        return config
+    
     def _apply_env_overrides(self, config: Dict):
         """Apply environment variable overrides to config"""
         # Server settings
@@ -92,7 +124,8 @@ class IBSimulatorServer:
                 self.handle_client,
                 self.host,
                 self.port,
-                reuse_address=True
+                reuse_address=True,
+                reuse_port=self.reuse_port or None
             )
             
             self.running = True
@@ -112,18 +145,21 @@ class IBSimulatorServer:
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         """Handle new client connection"""
         client_address = writer.get_extra_info('peername')
-        client_id = self.next_client_id
-        self.next_client_id += 1
-        
-        logger.info(f"New connection from {client_address} - Client ID: {client_id}")
         
         # Check max clients limit
-        if len(self.clients) >= self.max_clients:
+        if self._active == self._full_mask:
             logger.warning(f"Max clients reached ({self.max_clients}), rejecting connection")
             writer.close()
             await writer.wait_closed()
             return
         
+        # Take the lowest free slot
+        active = self._active
+        slot = (active ^ (active + 1)).bit_length() - 1
+        client_id = slot + 1
+        
+        logger.info(f"New connection from {client_address} - Client ID: {client_id}")
+        
         # Create client handler
         client_handler = ClientHandler(
             client_id=client_id,
@@ -133,7 +169,8 @@ class IBSimulatorServer:
             config=self.config
         )
         
-        self.clients[client_id] = client_handler
+        self._client_slots[slot] = client_handler
+        self._active |= 1 << slot
         
         try:
             # Handle client communication
@@ -142,20 +179,40 @@ class IBSimulatorServer:
             logger.error(f"Client {client_id} error: {e}")
         finally:
             # Clean up
-            if client_id in self.clients:
-                del self.clients[client_id]
+            self._client_slots[slot] = None
+            self._active &= ~(1 << slot)
             logger.info(f"Client {client_id} disconnected")
     
     def broadcast_market_data(self, symbol: str, data: Dict):
         """Broadcast market data to all subscribed clients"""
-        for client in self.clients.values():
+        # Frames go straight onto each client's outbound queue; the per-client
+        # writer task coalesces them into one writelines + drain. Values are
+        # encoded once, on the first subscriber, and shared by all of them.
+        fields = None
+        slots = self._client_slots
+        mask = self._active
+        while mask:
+            low = mask & -mask
+            client = slots[low.bit_length() - 1]
             if client.is_subscribed_to_symbol(symbol):
-                asyncio.create_task(client.send_market_data(symbol, data))
+                if fields is None:
+                    fields = self.encoder.encode_field_map(data)
+                client.enqueue_market_data(symbol, fields)
+            mask ^= low
+    
+    @property
+    def clients(self) -> Dict[int, ClientHandler]:
+        """Connected clients by client ID"""
+        return {
+            slot + 1: client
+            for slot, client in enumerate(self._client_slots)
+            if client is not None
+        }
     
     def get_next_order_id(self) -> int:
         """Get next valid order ID"""
-        # In real implementation, this would be properly synchronized
-        return 1000 + len(self.clients) * 1000 + int(datetime.now().timestamp() % 1000)
+        # next() on itertools.count is atomic, so no extra locking is needed
+        return self._order_id_base + next(self._order_id_seq)
     
     async def stop(self):
         """Stop the server gracefully"""
@@ -177,6 +234,17 @@ class IBSimulatorServer:
         logger.info("IB Simulator Server stopped")
 
 
+def install_uvloop() -> bool:
+    """Use uvloop's event loop policy when it is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 async def main():
     """Main entry point"""
     import argparse
@@ -213,4 +281,5 @@ async def main():
 
 
 if __name__ == '__main__':
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
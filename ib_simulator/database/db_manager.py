@@ -3,18 +3,182 @@ Database Manager for IB Simulator
 Handles all database operations with DuckDB
 """
 
+import asyncio
 import duckdb
 import bcrypt
+import pandas as pd
+import hashlib
 import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Tuple, Any
 import os
 from pathlib import Path
 
-from .schema import SCHEMA_SQL, VIEWS_SQL
+from .schema import SCHEMA_SQL, VIEWS_SQL, MERGE_OPTION_MARKET_DATA_SQL, DOUBLE_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+# Seconds a cached account summary stays valid
+_ACCOUNT_SUMMARY_TTL = 1.0
+
+# bcrypt cost factor; lower than the library default of 12 since this is a simulator
+_BCRYPT_ROUNDS = 10
+
+# Successful password checks remembered to skip repeat bcrypt verifications
+_AUTH_CACHE_MAX = 1024
+
+# SQL statements, built once at import
+_INSERT_ACCOUNT_SQL = """
+INSERT INTO accounts (
+    account_id, username, password_hash, account_type,
+    base_currency, net_liquidation, available_funds,
+    buying_power, cash_balance
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_AUTHENTICATE_USER_SQL = """
+SELECT account_id, username, password_hash, account_type,
+       CAST(net_liquidation AS DOUBLE), CAST(available_funds AS DOUBLE)
+FROM accounts
+WHERE username = ?
+"""
+
+_INSERT_CONTRACTS_SQL = """
+INSERT OR IGNORE INTO contracts (
+    con_id, symbol, security_type, exchange, currency,
+    local_symbol, trading_class, multiplier, min_tick, price_magnifier
+) VALUES
+"""
+_CONTRACT_ROW_PLACEHOLDERS = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_ACCOUNT_SUMMARY_SQL = """
+SELECT
+    account_id,
+    CAST(net_liquidation AS DOUBLE),
+    CAST(available_funds AS DOUBLE),
+    CAST(buying_power AS DOUBLE),
+    COALESCE(CAST(gross_position_value AS DOUBLE), 0.0),
+    CAST(cash_balance AS DOUBLE),
+    COALESCE(CAST(realized_pnl AS DOUBLE), 0.0),
+    COALESCE(CAST(unrealized_pnl AS DOUBLE), 0.0),
+    COALESCE(CAST(maintenance_margin AS DOUBLE), 0.0),
+    COALESCE(CAST(initial_margin AS DOUBLE), 0.0),
+    base_currency
+FROM accounts
+WHERE account_id = ?
+"""
+_ACCOUNT_SUMMARY_COLUMNS = (
+    'account_id', 'net_liquidation', 'available_funds', 'buying_power',
+    'gross_position_value', 'cash_balance', 'realized_pnl', 'unrealized_pnl',
+    'maintenance_margin', 'initial_margin', 'base_currency'
+)
+
+_POSITIONS_SQL = """
+SELECT
+    p.con_id, p.symbol, p.security_type, p.currency,
+    CAST(p.position AS DOUBLE),
+    CAST(p.avg_cost AS DOUBLE),
+    COALESCE(CAST(p.market_price AS DOUBLE), 0.0),
+    COALESCE(CAST(p.market_value AS DOUBLE), 0.0),
+    COALESCE(CAST(p.unrealized_pnl AS DOUBLE), 0.0),
+    COALESCE(CAST(p.realized_pnl AS DOUBLE), 0.0)
+FROM positions p
+WHERE p.account_id = ? AND p.position != 0
+ORDER BY p.symbol
+"""
+_POSITION_COLUMNS = (
+    'con_id', 'symbol', 'security_type', 'currency', 'position', 'avg_cost',
+    'market_price', 'market_value', 'unrealized_pnl', 'realized_pnl'
+)
+
+_UPSERT_POSITION_SQL = """
+INSERT OR REPLACE INTO positions (
+    account_id, con_id, symbol, security_type, position, avg_cost
+) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_ORDER_SQL = """
+INSERT INTO orders (
+    order_id, account_id, client_id, perm_id, con_id,
+    symbol, security_type, exchange, action, order_type,
+    total_quantity, remaining_quantity, limit_price, aux_price,
+    time_in_force, status
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_EXECUTION_SQL = """
+INSERT INTO executions (
+    exec_id, order_id, account_id, con_id, symbol,
+    side, shares, price, commission, realized_pnl
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_OPEN_ORDERS_SQL = """
+SELECT
+    order_id, account_id, symbol, action, order_type,
+    CAST(total_quantity AS DOUBLE),
+    CAST(filled_quantity AS DOUBLE),
+    CAST(remaining_quantity AS DOUBLE),
+    NULLIF(CAST(limit_price AS DOUBLE), 0),
+    status, created_at
+FROM open_orders_mat
+WHERE account_id = ?
+ORDER BY created_at DESC
+"""
+_OPEN_ORDER_COLUMNS = (
+    'order_id', 'account_id', 'symbol', 'action', 'order_type', 'total_quantity',
+    'filled_quantity', 'remaining_quantity', 'limit_price', 'status', 'created_at'
+)
+
+_MARKET_DATA_COLUMNS = (
+    'id', 'con_id', 'symbol', 'timestamp', 'bid_price', 'bid_size',
+    'ask_price', 'ask_size', 'last_price', 'last_size', 'volume'
+)
+_INSERT_MARKET_DATA_SQL = f"""
+INSERT INTO market_data ({', '.join(_MARKET_DATA_COLUMNS)})
+SELECT * FROM market_data_ticks
+"""
+_INSERT_MARKET_DATA_ROW_SQL = f"""
+INSERT INTO market_data ({', '.join(_MARKET_DATA_COLUMNS)})
+VALUES ({', '.join(['?'] * len(_MARKET_DATA_COLUMNS))})
+"""
+
+# Views kept as per-connection snapshot tables (<view>_mat, with a
+# refreshed_at column), rebuilt on the next read after a write touches them.
+# Only views with a reader belong here, and none may depend on the clock
+# (CURRENT_DATE etc.), since only writes mark a snapshot stale.
+_MATERIALIZED_VIEWS = ('open_orders',)
+
+_CONTRACT_BY_SYMBOL_SQL = """
+SELECT con_id, symbol, security_type, exchange, currency,
+       local_symbol, trading_class, multiplier
+FROM contracts
+WHERE symbol = ? AND security_type = ?
+"""
+
+
+@lru_cache(maxsize=None)
+def _update_order_status_sql(has_fill: bool, has_avg_price: bool, filled: bool) -> str:
+    """Build the UPDATE statement for one combination of populated fields"""
+    update_fields = ["status = ?", "updated_at = CURRENT_TIMESTAMP"]
+    
+    if has_fill:
+        update_fields.append("filled_quantity = ?")
+        update_fields.append("remaining_quantity = total_quantity - ?")
+    
+    if has_avg_price:
+        update_fields.append("avg_fill_price = ?")
+    
+    if filled:
+        update_fields.append("filled_at = CURRENT_TIMESTAMP")
+    
+    return f"UPDATE orders SET {', '.join(update_fields)} WHERE order_id = ?"
+
 
 class DatabaseManager:
     """Manages DuckDB database for IB Simulator"""
@@ -24,6 +188,29 @@ class DatabaseManager:
         self.config = config
         self.db_path = config['database']['path']
         self.connection = None
+        
+        # Market data ticks waiting for the next bulk insert
+        self._market_data_rows: List[tuple] = []
+        self._market_data_batch_size = config['database'].get('market_data_batch_size', 500)
+        self._market_data_flush_interval = config['database'].get('market_data_flush_interval', 0.1)
+        self._market_data_flush_handle: Optional[asyncio.TimerHandle] = None
+        self._next_market_data_id = 1
+        
+        # Materialized views that need rebuilding before their next read
+        self._stale_views = set(_MATERIALIZED_VIEWS)
+        
+        # Order/perm ID counters, seeded from the orders table at startup
+        self._id_lock = threading.Lock()
+        self._next_order_id = 1
+        self._next_perm_id = 1001
+        
+        # Read caches: contracts are seeded once, account summaries expire
+        self._contract_cache: Dict[Tuple[str, str], Dict] = {}
+        self._account_summary_cache: Dict[str, Tuple[float, Dict]] = {}
+        
+        # (username, password digest) -> password hash it verified against
+        self._auth_cache: 'OrderedDict[Tuple[str, bytes], str]' = OrderedDict()
+        
         self._ensure_db_directory()
         self._initialize_database()
     
@@ -34,17 +221,36 @@ class DatabaseManager:
             db_dir.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created database directory: {db_dir}")
     
+    def _duckdb_settings(self) -> Dict[str, Any]:
+        """DuckDB engine settings from the database config section"""
+        db_config = self.config['database']
+        settings = {}
+        
+        threads = db_config.get('threads')
+        if threads is not None:
+            settings['threads'] = threads or os.cpu_count() or 1
+        
+        for key in ('memory_limit', 'checkpoint_threshold'):
+            if db_config.get(key):
+                settings[key] = db_config[key]
+        
+        return settings
+    
     def _initialize_database(self):
         """Initialize database with schema and initial data"""
         try:
-            self.connection = duckdb.connect(self.db_path)
+            self.connection = duckdb.connect(self.db_path, config=self._duckdb_settings())
             logger.info(f"Connected to database: {self.db_path}")
             
             # Create schema
             self.connection.execute(SCHEMA_SQL)
+            self._migrate_double_columns()
+            self._merge_option_market_data()
             self.connection.execute(VIEWS_SQL)
             logger.info("Database schema created successfully")
             
+            self._seed_id_counters()
+            
             # Initialize default data
             self._initialize_default_data()
             
@@ -52,6 +258,74 @@ class DatabaseManager:
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    def _migrate_double_columns(self):
+        """Convert price columns of older databases from DECIMAL to DOUBLE"""
+        for table, columns in DOUBLE_COLUMNS.items():
+            placeholders = ', '.join(['?'] * len(columns))
+            pending = [row[0] for row in self.connection.execute(
+                "SELECT column_name FROM information_schema.columns "
+                f"WHERE table_name = ? AND column_name IN ({placeholders}) "
+                "AND data_type != 'DOUBLE'",
+                (table, *columns)
+            ).fetchall()]
+            if not pending:
+                continue
+            
+            # DuckDB refuses to alter a table that still has indexes, so
+            # drop them around the change and recreate them afterwards
+            indexes = self.connection.execute(
+                "SELECT index_name, sql FROM duckdb_indexes() WHERE table_name = ?",
+                (table,)
+            ).fetchall()
+            
+            self.connection.execute("BEGIN TRANSACTION")
+            try:
+                for index_name, _ in indexes:
+                    self.connection.execute(f"DROP INDEX {index_name}")
+                for column in pending:
+                    self.connection.execute(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE DOUBLE"
+                    )
+                for _, index_sql in indexes:
+                    self.connection.execute(index_sql)
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            logger.info(f"Converted {table} columns to DOUBLE: {', '.join(pending)}")
+    
+    def _merge_option_market_data(self):
+        """Fold a legacy option_market_data table into market_data"""
+        legacy = self.connection.execute(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_name = 'option_market_data' AND table_type = 'BASE TABLE'"
+        ).fetchone()
+        if not legacy:
+            return
+        
+        self.connection.execute("BEGIN TRANSACTION")
+        try:
+            self.connection.execute(MERGE_OPTION_MARKET_DATA_SQL)
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        logger.info("Merged option_market_data into market_data")
+    
+    def _seed_id_counters(self):
+        """Continue order, perm and tick IDs after the highest ones already stored"""
+        max_order_id, max_perm_id = self.connection.execute(
+            "SELECT MAX(order_id), MAX(perm_id) FROM orders"
+        ).fetchone()
+        self._next_order_id = (max_order_id or 0) + 1
+        self._next_perm_id = (max_perm_id or 1000) + 1
+        
+        # market_data.id has no default, so ticks are numbered here
+        max_market_data_id = self.connection.execute(
+            "SELECT MAX(id) FROM market_data"
+        ).fetchone()[0]
+        self._next_market_data_id = (max_market_data_id or 0) + 1
+    
     def _initialize_default_data(self):
         """Initialize default accounts and contracts"""
         # Check if accounts already exist
@@ -81,16 +355,12 @@ class DatabaseManager:
         """Create a new account"""
         try:
             # Hash password
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            password_hash = bcrypt.hashpw(
+                password.encode('utf-8'), bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)
+            ).decode('utf-8')
             
             # Insert account
-            self.connection.execute("""
-                INSERT INTO accounts (
-                    account_id, username, password_hash, account_type,
-                    base_currency, net_liquidation, available_funds,
-                    buying_power, cash_balance
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            self.connection.execute(_INSERT_ACCOUNT_SQL, (
                 account_id, username, password_hash, account_type,
                 base_currency, initial_balance, initial_balance,
                 initial_balance * 4,  # 4x buying power for margin
@@ -103,27 +373,21 @@ class DatabaseManager:
             logger.error(f"Failed to create account: {e}")
             raise
     
-    def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
+    async def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
         """Authenticate user and return account info"""
         try:
-            result = self.connection.execute("""
-                SELECT account_id, username, password_hash, account_type,
-                       net_liquidation, available_funds
-                FROM accounts
-                WHERE username = ?
-            """, (username,)).fetchone()
+            result = self.connection.execute(_AUTHENTICATE_USER_SQL, (username,)).fetchone()
             
             if not result:
                 return None
             
-            # Verify password
-            if bcrypt.checkpw(password.encode('utf-8'), result[2].encode('utf-8')):
+            if await self._verify_password(username, password, result[2]):
                 return {
                     'account_id': result[0],
                     'username': result[1],
                     'account_type': result[3],
-                    'net_liquidation': float(result[4]),
-                    'available_funds': float(result[5])
+                    'net_liquidation': result[4],
+                    'available_funds': result[5]
                 }
             
             return None
@@ -132,6 +396,29 @@ class DatabaseManager:
             logger.error(f"Authentication failed: {e}")
             return None
     
+    async def _verify_password(self, username: str, password: str, password_hash: str) -> bool:
+        """Check a password against its bcrypt hash, caching successful checks"""
+        password_bytes = password.encode('utf-8')
+        key = (username, hashlib.blake2b(password_bytes, digest_size=16).digest())
+        
+        # A cache hit only counts while the stored hash is unchanged
+        if self._auth_cache.get(key) == password_hash:
+            self._auth_cache.move_to_end(key)
+            return True
+        
+        # Verify off the event loop; bcrypt is deliberately slow. bcrypt
+        # hashes are plain ASCII, so the stored hash needs no UTF-8 codec.
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(
+            None, bcrypt.checkpw, password_bytes, password_hash.encode('ascii')
+        ):
+            return False
+        
+        self._auth_cache[key] = password_hash
+        if len(self._auth_cache) > _AUTH_CACHE_MAX:
+            self._auth_cache.popitem(last=False)
+        return True
+    
     def _create_default_contracts(self):
         """Create default stock contracts"""
         contracts = []
@@ -144,79 +431,66 @@ class DatabaseManager:
             ))
             con_id += 1
         
-        # Bulk insert contracts
+        # Insert all contracts with one multi-row statement
         if contracts:
-            self.connection.executemany("""
-                INSERT OR IGNORE INTO contracts (
-                    con_id, symbol, security_type, exchange, currency,
-                    local_symbol, trading_class, multiplier, min_tick, price_magnifier
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, contracts)
+            values = ', '.join([_CONTRACT_ROW_PLACEHOLDERS] * len(contracts))
+            params = [field for contract in contracts for field in contract]
+            self.connection.execute(_INSERT_CONTRACTS_SQL + values, params)
             
             logger.info(f"Created {len(contracts)} default contracts")
     
     def get_account_summary(self, account_id: str) -> Dict:
         """Get account summary"""
+        cached = self._account_summary_cache.get(account_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        
         try:
-            result = self.connection.execute("""
-                SELECT 
-                    account_id, net_liquidation, available_funds, buying_power,
-                    gross_position_value, cash_balance, realized_pnl, unrealized_pnl,
-                    maintenance_margin, initial_margin, base_currency
-                FROM accounts
-                WHERE account_id = ?
-            """, (account_id,)).fetchone()
+            result = self.connection.execute(_ACCOUNT_SUMMARY_SQL, (account_id,)).fetchone()
             
             if not result:
                 return {}
             
-            return {
-                'account_id': result[0],
-                'net_liquidation': float(result[1]),
-                'available_funds': float(result[2]),
-                'buying_power': float(result[3]),
-                'gross_position_value': float(result[4]),
-                'cash_balance': float(result[5]),
-                'realized_pnl': float(result[6]),
-                'unrealized_pnl': float(result[7]),
-                'maintenance_margin': float(result[8]),
-                'initial_margin': float(result[9]),
-                'base_currency': result[10]
-            }
+            # Numeric columns arrive as non-null floats from the query
+            summary = dict(zip(_ACCOUNT_SUMMARY_COLUMNS, result))
+            self._account_summary_cache[account_id] = (
+                time.monotonic() + _ACCOUNT_SUMMARY_TTL, summary
+            )
+            return summary
             
         except Exception as e:
             logger.error(f"Failed to get account summary: {e}")
             return {}
     
+    def _invalidate_account_summary(self, account_id: Optional[str] = None):
+        """Drop the cached summary for an account, or for all accounts"""
+        if account_id is None:
+            self._account_summary_cache.clear()
+        else:
+            self._account_summary_cache.pop(account_id, None)
+    
+    def _mark_stale(self, *views: str):
+        """Flag materialized views whose base tables have changed"""
+        self._stale_views.update(views)
+    
+    def _refresh_view(self, view: str):
+        """Rebuild a materialized view if it has been marked stale"""
+        if view not in self._stale_views:
+            return
+        
+        self.connection.execute(
+            f"CREATE OR REPLACE TEMP TABLE {view}_mat AS "
+            f"SELECT *, CURRENT_TIMESTAMP AS refreshed_at FROM {view}"
+        )
+        self._stale_views.discard(view)
+    
     def get_positions(self, account_id: str) -> List[Dict]:
         """Get all positions for an account"""
         try:
-            results = self.connection.execute("""
-                SELECT 
-                    p.con_id, p.symbol, p.security_type, p.currency,
-                    p.position, p.avg_cost, p.market_price, p.market_value,
-                    p.unrealized_pnl, p.realized_pnl
-                FROM positions p
-                WHERE p.account_id = ? AND p.position != 0
-                ORDER BY p.symbol
-            """, (account_id,)).fetchall()
-            
-            positions = []
-            for row in results:
-                positions.append({
-                    'con_id': row[0],
-                    'symbol': row[1],
-                    'security_type': row[2],
-                    'currency': row[3],
-                    'position': float(row[4]),
-                    'avg_cost': float(row[5]),
-                    'market_price': float(row[6]) if row[6] else 0,
-                    'market_value': float(row[7]) if row[7] else 0,
-                    'unrealized_pnl': float(row[8]) if row[8] else 0,
-                    'realized_pnl': float(row[9]) if row[9] else 0
-                })
-            
-            return positions
+            # DuckDB casts and null-fills the numeric columns, so rows map
+            # straight onto dicts
+            results = self.connection.execute(_POSITIONS_SQL, (account_id,)).fetchall()
+            return [dict(zip(_POSITION_COLUMNS, row)) for row in results]
             
         except Exception as e:
             logger.error(f"Failed to get positions: {e}")
@@ -226,12 +500,12 @@ class DatabaseManager:
                        security_type: str, position: float, avg_cost: float):
         """Update or create a position"""
         try:
-            self.connection.execute("""
-                INSERT OR REPLACE INTO positions (
-                    account_id, con_id, symbol, security_type, position, avg_cost
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (account_id, con_id, symbol, security_type, position, avg_cost))
+            self.connection.execute(
+                _UPSERT_POSITION_SQL,
+                (account_id, con_id, symbol, security_type, position, avg_cost)
+            )
             
+            self._invalidate_account_summary(account_id)
             logger.debug(f"Updated position: {symbol} qty={position} for {account_id}")
             
         except Exception as e:
@@ -241,23 +515,15 @@ class DatabaseManager:
     def create_order(self, order_data: Dict) -> int:
         """Create a new order and return order ID"""
         try:
-            # Get next order ID
-            result = self.connection.execute("SELECT MAX(order_id) FROM orders").fetchone()
-            order_id = (result[0] or 0) + 1
-            
-            # Get next perm ID
-            result = self.connection.execute("SELECT MAX(perm_id) FROM orders").fetchone()
-            perm_id = (result[0] or 1000) + 1
+            # Get next order and perm IDs
+            with self._id_lock:
+                order_id = self._next_order_id
+                perm_id = self._next_perm_id
+                self._next_order_id += 1
+                self._next_perm_id += 1
             
             # Insert order
-            self.connection.execute("""
-                INSERT INTO orders (
-                    order_id, account_id, client_id, perm_id, con_id,
-                    symbol, security_type, exchange, action, order_type,
-                    total_quantity, remaining_quantity, limit_price, aux_price,
-                    time_in_force, status
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            self.connection.execute(_INSERT_ORDER_SQL, (
                 order_id, order_data['account_id'], order_data['client_id'],
                 perm_id, order_data['con_id'], order_data['symbol'],
                 order_data['security_type'], order_data.get('exchange', 'SMART'),
@@ -267,6 +533,7 @@ class DatabaseManager:
                 order_data.get('time_in_force', 'DAY'), 'PendingSubmit'
             ))
             
+            self._mark_stale('open_orders')
             logger.info(f"Created order {order_id} for {order_data['symbol']}")
             return order_id
             
@@ -278,26 +545,23 @@ class DatabaseManager:
                            avg_fill_price: float = None):
         """Update order status"""
         try:
-            update_fields = ["status = ?", "updated_at = CURRENT_TIMESTAMP"]
             params = [status]
             
             if filled_qty is not None:
-                update_fields.append("filled_quantity = ?")
-                update_fields.append("remaining_quantity = total_quantity - ?")
                 params.extend([filled_qty, filled_qty])
             
             if avg_fill_price is not None:
-                update_fields.append("avg_fill_price = ?")
                 params.append(avg_fill_price)
             
-            if status == 'Filled':
-                update_fields.append("filled_at = CURRENT_TIMESTAMP")
-            
             params.append(order_id)
             
-            query = f"UPDATE orders SET {', '.join(update_fields)} WHERE order_id = ?"
+            query = _update_order_status_sql(
+                filled_qty is not None, avg_fill_price is not None, status == 'Filled'
+            )
             self.connection.execute(query, params)
             
+            self._invalidate_account_summary()
+            self._mark_stale('open_orders')
             logger.debug(f"Updated order {order_id} status to {status}")
             
         except Exception as e:
@@ -307,12 +571,7 @@ class DatabaseManager:
     def record_execution(self, exec_data: Dict):
         """Record trade execution"""
         try:
-            self.connection.execute("""
-                INSERT INTO executions (
-                    exec_id, order_id, account_id, con_id, symbol,
-                    side, shares, price, commission, realized_pnl
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            self.connection.execute(_INSERT_EXECUTION_SQL, (
                 exec_data['exec_id'], exec_data['order_id'],
                 exec_data['account_id'], exec_data['con_id'],
                 exec_data['symbol'], exec_data['side'],
@@ -321,6 +580,7 @@ class DatabaseManager:
                 exec_data.get('realized_pnl', 0)
             ))
             
+            self._invalidate_account_summary(exec_data['account_id'])
             logger.info(f"Recorded execution {exec_data['exec_id']}")
             
         except Exception as e:
@@ -330,29 +590,9 @@ class DatabaseManager:
     def get_open_orders(self, account_id: str) -> List[Dict]:
         """Get all open orders for an account"""
         try:
-            results = self.connection.execute("""
-                SELECT * FROM open_orders
-                WHERE account_id = ?
-                ORDER BY created_at DESC
-            """, (account_id,)).fetchall()
-            
-            orders = []
-            for row in results:
-                orders.append({
-                    'order_id': row[0],
-                    'account_id': row[1],
-                    'symbol': row[2],
-                    'action': row[3],
-                    'order_type': row[4],
-                    'total_quantity': float(row[5]),
-                    'filled_quantity': float(row[6]),
-                    'remaining_quantity': float(row[7]),
-                    'limit_price': float(row[8]) if row[8] else None,
-                    'status': row[9],
-                    'created_at': row[10]
-                })
-            
-            return orders
+            self._refresh_view('open_orders')
+            results = self.connection.execute(_OPEN_ORDERS_SQL, (account_id,)).fetchall()
+            return [dict(zip(_OPEN_ORDER_COLUMNS, row)) for row in results]
             
         except Exception as e:
             logger.error(f"Failed to get open orders: {e}")
@@ -360,44 +600,101 @@ class DatabaseManager:
     
     def update_market_data(self, con_id: int, symbol: str, data: Dict):
         """Update market data for a contract"""
+        rows = self._market_data_rows
+        if not rows:
+            self._schedule_market_data_flush()
+        
+        rows.append((
+            self._next_market_data_id, con_id, symbol, datetime.now(),
+            data.get('bid'), data.get('bid_size'),
+            data.get('ask'), data.get('ask_size'),
+            data.get('last'), data.get('last_size'),
+            data.get('volume')
+        ))
+        self._next_market_data_id += 1
+        
+        if len(rows) >= self._market_data_batch_size:
+            self.flush_market_data()
+    
+    def _schedule_market_data_flush(self):
+        """Bound how long the first tick of a batch waits for its insert"""
         try:
-            self.connection.execute("""
-                INSERT INTO market_data (
-                    con_id, symbol, timestamp, bid_price, bid_size,
-                    ask_price, ask_size, last_price, last_size, volume
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                con_id, symbol, datetime.now(),
-                data.get('bid'), data.get('bid_size'),
-                data.get('ask'), data.get('ask_size'),
-                data.get('last'), data.get('last_size'),
-                data.get('volume')
-            ))
-            
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. scripts); the batch waits for its size
+            # limit or close()
+            return
+        
+        self._market_data_flush_handle = loop.call_later(
+            self._market_data_flush_interval, self.flush_market_data
+        )
+    
+    def flush_market_data(self):
+        """Write buffered market data ticks in one bulk insert"""
+        if self._market_data_flush_handle is not None:
+            self._market_data_flush_handle.cancel()
+            self._market_data_flush_handle = None
+        
+        if not self._market_data_rows:
+            return
+        
+        rows = self._market_data_rows
+        self._market_data_rows = []
+        
+        # Insert in (con_id, timestamp) order so each batch lands sorted and
+        # DuckDB's per-row-group min/max can skip blocks on range scans
+        rows.sort(key=lambda row: (row[1], row[3]))
+        
+        # One vectorized insert from a DataFrame scan instead of a
+        # per-row executemany
+        ticks = pd.DataFrame.from_records(rows, columns=_MARKET_DATA_COLUMNS)
+        try:
+            self.connection.register('market_data_ticks', ticks)
+            self.connection.execute(_INSERT_MARKET_DATA_SQL)
+            return
         except Exception as e:
-            logger.error(f"Failed to update market data: {e}")
+            logger.warning(f"Bulk market data insert failed, retrying per tick: {e}")
+        finally:
+            self.connection.unregister('market_data_ticks')
+        
+        # The batch is all-or-nothing, so keep the good ticks and only drop
+        # the ones that are rejected on their own
+        failed = 0
+        for row in rows:
+            try:
+                self.connection.execute(_INSERT_MARKET_DATA_ROW_SQL, row)
+            except Exception as e:
+                failed += 1
+                last_error = e
+        if failed:
+            logger.error(f"Failed to update market data for {failed} of {len(rows)} ticks: {last_error}")
     
     def get_contract_by_symbol(self, symbol: str, security_type: str = 'STK') -> Optional[Dict]:
         """Get contract details by symbol"""
+        key = (symbol, security_type)
+        contract = self._contract_cache.get(key)
+        if contract is not None:
+            return contract
+        
         try:
-            result = self.connection.execute("""
-                SELECT con_id, symbol, security_type, exchange, currency,
-                       local_symbol, trading_class, multiplier
-                FROM contracts
-                WHERE symbol = ? AND security_type = ?
-            """, (symbol, security_type)).fetchone()
+            result = self.connection.execute(_CONTRACT_BY_SYMBOL_SQL, key).fetchone()
             
             if result:
-                return {
+                # Cached for the process lifetime, so share the (NOT NULL) key
+                # strings with the interned values coming out of the decoder
+                intern = sys.intern
+                contract = {
                     'con_id': result[0],
-                    'symbol': result[1],
-                    'security_type': result[2],
+                    'symbol': intern(result[1]),
+                    'security_type': intern(result[2]),
                     'exchange': result[3],
                     'currency': result[4],
                     'local_symbol': result[5],
                     'trading_class': result[6],
                     'multiplier': result[7]
                 }
+                self._contract_cache[key] = contract
+                return contract
             
             return None
             
@@ -408,5 +705,6 @@ class DatabaseManager:
     def close(self):
         """Close database connection"""
         if self.connection:
+            self.flush_market_data()
             self.connection.close()
             logger.info("Database connection closed")
\ No newline at end of file
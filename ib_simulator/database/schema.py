@@ -34,8 +34,8 @@ CREATE TABLE IF NOT EXISTS positions (
     currency VARCHAR DEFAULT 'USD',
     position DECIMAL(20,4) NOT NULL,
     avg_cost DECIMAL(20,4) NOT NULL,
-    market_price DECIMAL(20,4),
-    market_value DECIMAL(20,2),
+    market_price DOUBLE,
+    market_value DOUBLE,
     unrealized_pnl DECIMAL(20,2),
     realized_pnl DECIMAL(20,2) DEFAULT 0,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -111,52 +111,41 @@ CREATE TABLE IF NOT EXISTS option_contracts (
     underlying_con_id INTEGER,
     strike DECIMAL(20,4) NOT NULL,
     expiry DATE NOT NULL,
-    right VARCHAR NOT NULL CHECK (right IN ('C', 'P')),
+    "right" VARCHAR NOT NULL CHECK ("right" IN ('C', 'P')),
     multiplier INTEGER DEFAULT 100,
     trading_class VARCHAR,
     exercise_style VARCHAR DEFAULT 'AMERICAN'
 );
 
+-- Market data tables store prices and greeks as DOUBLE; DECIMAL is kept
+-- for ledger columns (cash, P&L, commissions, order prices)
+
 -- Market data table
 CREATE TABLE IF NOT EXISTS market_data (
     id INTEGER PRIMARY KEY,
     con_id INTEGER NOT NULL,
     symbol VARCHAR NOT NULL,
     timestamp TIMESTAMP NOT NULL,
-    bid_price DECIMAL(20,4),
-    bid_size INTEGER,
-    ask_price DECIMAL(20,4),
-    ask_size INTEGER,
-    last_price DECIMAL(20,4),
-    last_size INTEGER,
-    volume BIGINT,
-    open DECIMAL(20,4),
-    high DECIMAL(20,4),
-    low DECIMAL(20,4),
-    close DECIMAL(20,4),
-    vwap DECIMAL(20,4),
-    UNIQUE(con_id, timestamp)
-);
-
--- Option market data table
-CREATE TABLE IF NOT EXISTS option_market_data (
-    id INTEGER PRIMARY KEY,
-    con_id INTEGER NOT NULL REFERENCES option_contracts(con_id),
-    timestamp TIMESTAMP NOT NULL,
-    bid_price DECIMAL(20,4),
+    bid_price DOUBLE,
     bid_size INTEGER,
-    ask_price DECIMAL(20,4),
+    ask_price DOUBLE,
     ask_size INTEGER,
-    last_price DECIMAL(20,4),
+    last_price DOUBLE,
     last_size INTEGER,
     volume BIGINT,
+    open DOUBLE,
+    high DOUBLE,
+    low DOUBLE,
+    close DOUBLE,
+    vwap DOUBLE,
+    -- Option-only fields, NULL for other instruments
     open_interest INTEGER,
-    implied_volatility DECIMAL(10,6),
-    delta DECIMAL(10,6),
-    gamma DECIMAL(10,6),
-    theta DECIMAL(10,6),
-    vega DECIMAL(10,6),
-    rho DECIMAL(10,6),
+    implied_volatility DOUBLE,
+    delta DOUBLE,
+    gamma DOUBLE,
+    theta DOUBLE,
+    vega DOUBLE,
+    rho DOUBLE,
     UNIQUE(con_id, timestamp)
 );
 
@@ -167,38 +156,38 @@ CREATE TABLE IF NOT EXISTS historical_data (
     symbol VARCHAR NOT NULL,
     bar_time TIMESTAMP NOT NULL,
     bar_size VARCHAR NOT NULL,
-    open DECIMAL(20,4) NOT NULL,
-    high DECIMAL(20,4) NOT NULL,
-    low DECIMAL(20,4) NOT NULL,
-    close DECIMAL(20,4) NOT NULL,
+    open DOUBLE NOT NULL,
+    high DOUBLE NOT NULL,
+    low DOUBLE NOT NULL,
+    close DOUBLE NOT NULL,
     volume BIGINT,
-    wap DECIMAL(20,4),
+    wap DOUBLE,
     bar_count INTEGER,
     UNIQUE(con_id, bar_time, bar_size)
 );
 
--- Account values history
+-- Account values history; the current snapshot of every other balance
+-- lives in accounts
 CREATE TABLE IF NOT EXISTS account_values (
     id INTEGER PRIMARY KEY,
     account_id VARCHAR NOT NULL REFERENCES accounts(account_id),
     timestamp TIMESTAMP NOT NULL,
     net_liquidation DECIMAL(20,2) NOT NULL,
-    total_cash_value DECIMAL(20,2) NOT NULL,
-    gross_position_value DECIMAL(20,2) NOT NULL,
     unrealized_pnl DECIMAL(20,2),
     realized_pnl DECIMAL(20,2),
-    excess_liquidity DECIMAL(20,2),
-    maintenance_margin DECIMAL(20,2),
     daily_pnl DECIMAL(20,2)
 );
 
--- Audit log table
+-- Audit log table; common event fields are typed columns, details is
+-- only for rare extra context
 CREATE TABLE IF NOT EXISTS audit_log (
     id INTEGER PRIMARY KEY,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     account_id VARCHAR,
     action_type VARCHAR NOT NULL,
-    details TEXT,
+    event_target_id BIGINT,
+    event_amount DECIMAL(20,2),
+    details VARCHAR,
     ip_address VARCHAR,
     client_id INTEGER
 );
@@ -208,13 +197,89 @@ CREATE INDEX IF NOT EXISTS idx_positions_account ON positions(account_id);
 CREATE INDEX IF NOT EXISTS idx_orders_account ON orders(account_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
 CREATE INDEX IF NOT EXISTS idx_executions_order ON executions(order_id);
-CREATE INDEX IF NOT EXISTS idx_market_data_symbol ON market_data(symbol, timestamp);
 CREATE INDEX IF NOT EXISTS idx_option_contracts_underlying ON option_contracts(underlying_symbol);
-CREATE INDEX IF NOT EXISTS idx_account_values_timestamp ON account_values(account_id, timestamp);
+
+-- Append-only time series rely on sorted storage and zonemaps instead of
+-- secondary indexes; drop the ones older databases were created with
+DROP INDEX IF EXISTS idx_market_data_symbol;
+DROP INDEX IF EXISTS idx_account_values_timestamp;
+
+-- Narrow account_values in databases created with the wider layout
+ALTER TABLE account_values DROP COLUMN IF EXISTS total_cash_value;
+ALTER TABLE account_values DROP COLUMN IF EXISTS gross_position_value;
+ALTER TABLE account_values DROP COLUMN IF EXISTS excess_liquidity;
+ALTER TABLE account_values DROP COLUMN IF EXISTS maintenance_margin;
+
+-- Option columns for market_data tables created before options were
+-- merged into it
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS open_interest INTEGER;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS implied_volatility DOUBLE;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS delta DOUBLE;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS gamma DOUBLE;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS theta DOUBLE;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS vega DOUBLE;
+ALTER TABLE market_data ADD COLUMN IF NOT EXISTS rho DOUBLE;
+
+-- Typed audit columns for databases created before they existed
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS event_target_id BIGINT;
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS event_amount DECIMAL(20,2);
+"""
+
+# Price columns that older databases created as DECIMAL; DatabaseManager
+# converts any that are not DOUBLE yet when it opens the database
+DOUBLE_COLUMNS = {
+    'market_data': (
+        'bid_price', 'ask_price', 'last_price',
+        'open', 'high', 'low', 'close', 'vwap'
+    ),
+    'historical_data': ('open', 'high', 'low', 'close', 'wap'),
+    'positions': ('market_price', 'market_value'),
+}
+
+# Moves rows from the option_market_data table of older databases into
+# market_data; run before VIEWS_SQL replaces the table with a view
+MERGE_OPTION_MARKET_DATA_SQL = """
+INSERT OR IGNORE INTO market_data (
+    id, con_id, symbol, timestamp, bid_price, bid_size, ask_price, ask_size,
+    last_price, last_size, volume, open_interest, implied_volatility,
+    delta, gamma, theta, vega, rho
+)
+SELECT
+    (SELECT COALESCE(MAX(id), 0) FROM market_data) + row_number() OVER (ORDER BY o.id),
+    o.con_id, c.symbol, o.timestamp, o.bid_price, o.bid_size, o.ask_price, o.ask_size,
+    o.last_price, o.last_size, o.volume, o.open_interest, o.implied_volatility,
+    o.delta, o.gamma, o.theta, o.vega, o.rho
+FROM option_market_data o
+JOIN contracts c ON c.con_id = o.con_id;
+
+DROP TABLE option_market_data;
 """
 
 # Views for easier querying
 VIEWS_SQL = """
+-- Option market data view: the option rows of market_data
+CREATE OR REPLACE VIEW option_market_data AS
+SELECT
+    m.id,
+    m.con_id,
+    m.timestamp,
+    m.bid_price,
+    m.bid_size,
+    m.ask_price,
+    m.ask_size,
+    m.last_price,
+    m.last_size,
+    m.volume,
+    m.open_interest,
+    m.implied_volatility,
+    m.delta,
+    m.gamma,
+    m.theta,
+    m.vega,
+    m.rho
+FROM market_data m
+WHERE m.con_id IN (SELECT con_id FROM option_contracts);
+
 -- Portfolio summary view
 CREATE OR REPLACE VIEW portfolio_summary AS
 SELECT 
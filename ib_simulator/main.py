@@ -5,7 +5,11 @@ Main entry point for the IB API simulator server
 """
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 import argparse
 from pathlib import Path
@@ -13,25 +17,37 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from ib_simulator.core.server import IBSimulatorServer
+from ib_simulator.core.server import IBSimulatorServer, install_uvloop
 
 
-def setup_logging(level: str = "INFO"):
+def setup_logging(level: str = "INFO") -> logging.handlers.QueueListener:
     """Set up logging configuration"""
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
+    formatter = logging.Formatter(log_format)
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler("ib_simulator.log")
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    # Log calls only enqueue records; a listener thread does the console
+    # and file I/O so the event loop never blocks on it
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    
     # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("ib_simulator.log")
-        ]
-    )
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, level.upper()))
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     # Set specific loggers
     logging.getLogger("asyncio").setLevel(logging.WARNING)
+    
+    return listener
 
 
 def print_banner():
@@ -115,12 +131,10 @@ Examples:
     
     # Apply command line overrides to environment
     if args.host:
-        import os
         os.environ['IB_SIM_HOST'] = args.host
         logger.info(f"Host override: {args.host}")
     
     if args.port:
-        import os
         os.environ['IB_SIM_PORT'] = str(args.port)
         logger.info(f"Port override: {args.port}")
     
@@ -149,6 +163,9 @@ Examples:
 
 
 if __name__ == '__main__':
+    # Optional: libuv-backed event loop when uvloop is installed
+    install_uvloop()
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
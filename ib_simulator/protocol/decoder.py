@@ -3,35 +3,240 @@ IB Protocol Message Decoder
 Decodes messages according to IB TWS API protocol
 """
 
-import struct
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+import sys
+from typing import Iterator, List, NamedTuple, Tuple, Optional, Any, Union
 
+from .framing import LENGTH_PREFIX
 from .message_ids import IncomingMessageIds
 
 logger = logging.getLogger(__name__)
 
 
+# Parsed message types
+class ContractMsg(NamedTuple):
+    """Contract fields shared by several requests"""
+    con_id: Optional[int]
+    symbol: str
+    sec_type: str
+    expiry: str
+    strike: Optional[float]
+    right: str
+    multiplier: Optional[int]
+    exchange: str
+    primary_exchange: str
+    currency: str
+    local_symbol: str
+    trading_class: str
+
+
+class OrderMsg(NamedTuple):
+    """Order fields of a place order request"""
+    action: str
+    total_quantity: Optional[float]
+    order_type: str
+    limit_price: Optional[float]
+    aux_price: Optional[float]
+    tif: str
+    oca_group: str
+    account: str
+    open_close: str
+    origin: Optional[int]
+    order_ref: str
+    transmit: bool
+    parent_id: Optional[int]
+
+
+class ExecutionFilterMsg(NamedTuple):
+    """Execution filter of an executions request"""
+    client_id: Optional[int]
+    account_code: str
+    time: str
+    symbol: str
+    sec_type: str
+    exchange: str
+    side: str
+
+
+class EmptyMsg(NamedTuple):
+    """Request without parameters"""
+
+
+class ReqMktDataMsg(NamedTuple):
+    req_id: Optional[int]
+    contract: ContractMsg
+    generic_tick_list: str
+    snapshot: bool
+    regulatory_snapshot: bool
+    mkt_data_options: str
+
+
+class CancelMktDataMsg(NamedTuple):
+    req_id: Optional[int]
+
+
+class PlaceOrderMsg(NamedTuple):
+    order_id: Optional[int]
+    contract: ContractMsg
+    order: OrderMsg
+
+
+class CancelOrderMsg(NamedTuple):
+    order_id: Optional[int]
+
+
+class ReqAcctDataMsg(NamedTuple):
+    subscribe: bool
+    account_code: str
+
+
+class ReqPositionsMultiMsg(NamedTuple):
+    req_id: Optional[int]
+    account: str
+    model_code: str
+
+
+class ReqContractDetailsMsg(NamedTuple):
+    req_id: Optional[int]
+    contract: ContractMsg
+    include_expired: bool
+
+
+class ReqSecDefOptParamsMsg(NamedTuple):
+    req_id: Optional[int]
+    underlying_symbol: str
+    fut_fop_exchange: str
+    underlying_sec_type: str
+    underlying_con_id: Optional[int]
+
+
+class ReqExecutionsMsg(NamedTuple):
+    req_id: Optional[int]
+    filter: ExecutionFilterMsg
+
+
+class ReqIdsMsg(NamedTuple):
+    num_ids: Optional[int]
+
+
+class ReqHistoricalDataMsg(NamedTuple):
+    req_id: Optional[int]
+    contract: ContractMsg
+    end_date_time: str
+    bar_size_setting: str
+    duration_str: str
+    use_rth: bool
+    what_to_show: str
+    format_date: Optional[int]
+
+
+class StartApiMsg(NamedTuple):
+    client_id: Optional[int]
+    optional_capabilities: str
+
+
+_EMPTY_MSG = EmptyMsg()
+
+
+def _to_int(value: str) -> Optional[int]:
+    """Convert a field to int; empty or malformed fields are None"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _read_int(it: Iterator[str]) -> Optional[int]:
+    """Read the next field as an int"""
+    return _to_int(next(it, ''))
+
+
+def _read_float(it: Iterator[str]) -> Optional[float]:
+    """Read the next field as a float; empty or malformed fields are None"""
+    value = next(it, '')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _read_str(it: Iterator[str]) -> str:
+    """Read the next field as a string"""
+    return next(it, '')
+
+
+def _read_interned_str(it: Iterator[str]) -> str:
+    """Read a string field from a small repeating vocabulary, interned"""
+    return sys.intern(next(it, ''))
+
+
+def _read_bool(it: Iterator[str]) -> bool:
+    """Read the next field as a boolean"""
+    return next(it, '') == '1'
+
+
+def _read_contract(it: Iterator[str]) -> ContractMsg:
+    """Read the contract fields shared by several requests"""
+    return ContractMsg(
+        _read_int(it),            # con_id
+        _read_interned_str(it),   # symbol
+        _read_interned_str(it),   # sec_type
+        _read_str(it),            # expiry
+        _read_float(it),          # strike
+        _read_interned_str(it),   # right
+        _read_int(it),            # multiplier
+        _read_interned_str(it),   # exchange
+        _read_interned_str(it),   # primary_exchange
+        _read_interned_str(it),   # currency
+        _read_str(it),            # local_symbol
+        _read_str(it)             # trading_class
+    )
+
+
 class MessageDecoder:
     """Decodes messages from IB TWS API protocol"""
     
     def __init__(self, encoding: str = 'latin-1'):
         self.encoding = encoding
+        
+        # Message ID -> parser, built once rather than per message
+        self._parsers = {
+            IncomingMessageIds.REQ_MKT_DATA: self.parse_req_mkt_data,
+            IncomingMessageIds.CANCEL_MKT_DATA: self.parse_cancel_mkt_data,
+            IncomingMessageIds.PLACE_ORDER: self.parse_place_order,
+            IncomingMessageIds.CANCEL_ORDER: self.parse_cancel_order,
+            IncomingMessageIds.REQ_OPEN_ORDERS: self.parse_req_open_orders,
+            IncomingMessageIds.REQ_ACCT_DATA: self.parse_req_acct_data,
+            IncomingMessageIds.REQ_POSITIONS: self.parse_req_positions,
+            IncomingMessageIds.REQ_POSITIONS_MULTI: self.parse_req_positions_multi,
+            IncomingMessageIds.REQ_CONTRACT_DATA: self.parse_req_contract_details,
+            IncomingMessageIds.REQ_SEC_DEF_OPT_PARAMS: self.parse_req_sec_def_opt_params,
+            IncomingMessageIds.REQ_EXECUTIONS: self.parse_req_executions,
+            IncomingMessageIds.REQ_IDS: self.parse_req_ids,
+            IncomingMessageIds.REQ_MANAGED_ACCTS: self.parse_req_managed_accts,
+            IncomingMessageIds.REQ_CURRENT_TIME: self.parse_req_current_time,
+            IncomingMessageIds.REQ_HISTORICAL_DATA: self.parse_req_historical_data,
+            IncomingMessageIds.START_API: self.parse_start_api,
+        }
     
-    def decode_message(self, data: bytes) -> Tuple[Optional[int], List[Any]]:
+    def decode_message(self, data: Union[bytes, memoryview]) -> Tuple[Optional[int], List[Any]]:
         """Decode a complete message with length prefix"""
         if len(data) < 4:
             return None, []
         
         # Extract message length (4 bytes, big-endian)
-        msg_length = struct.unpack('>I', data[:4])[0]
+        msg_length = LENGTH_PREFIX.unpack_from(data)[0]
         
         if len(data) < 4 + msg_length:
             # Incomplete message
             return None, []
         
-        # Extract message body
-        msg_body = data[4:4 + msg_length]
+        # View the message body in place; slicing bytes would copy it
+        msg_body = memoryview(data)[4:4 + msg_length]
         
         # Decode fields
         fields = self.decode_fields(msg_body)
@@ -43,407 +248,224 @@ class MessageDecoder:
         msg_id = int(fields[0])
         return msg_id, fields[1:]
     
-    def decode_fields(self, data: bytes) -> List[str]:
+    def decode_fields(self, data: Union[bytes, memoryview]) -> List[str]:
         """Decode null-terminated fields from message body"""
-        fields = []
-        current_field = b''
-        
-        for byte in data:
-            if byte == 0:  # Null terminator
-                fields.append(current_field.decode(self.encoding))
-                current_field = b''
-            else:
-                current_field += bytes([byte])
-        
-        # Add last field if no trailing null
-        if current_field:
-            fields.append(current_field.decode(self.encoding))
+        # One decode of the whole body, then a single split on nulls
+        parts = str(data, self.encoding).split('\x00')
         
-        return fields
-    
-    def read_int(self, fields: List[str], index: int) -> Tuple[Optional[int], int]:
-        """Read integer field and return (value, next_index)"""
-        if index >= len(fields):
-            return None, index
-        
-        try:
-            value = int(fields[index]) if fields[index] else None
-            return value, index + 1
-        except ValueError:
-            return None, index + 1
-    
-    def read_float(self, fields: List[str], index: int) -> Tuple[Optional[float], int]:
-        """Read float field and return (value, next_index)"""
-        if index >= len(fields):
-            return None, index
+        # A trailing null leaves an empty last token; an unterminated last
+        # field is kept only if it has content
+        if not parts[-1]:
+            parts.pop()
         
-        try:
-            value = float(fields[index]) if fields[index] else None
-            return value, index + 1
-        except ValueError:
-            return None, index + 1
-    
-    def read_str(self, fields: List[str], index: int) -> Tuple[str, int]:
-        """Read string field and return (value, next_index)"""
-        if index >= len(fields):
-            return '', index
-        
-        return fields[index], index + 1
-    
-    def read_bool(self, fields: List[str], index: int) -> Tuple[bool, int]:
-        """Read boolean field and return (value, next_index)"""
-        if index >= len(fields):
-            return False, index
-        
-        value = fields[index] == '1'
-        return value, index + 1
+        return parts
     
     # Message parsers
-    def parse_req_mkt_data(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_mkt_data(self, it: Iterator[str]) -> ReqMktDataMsg:
         """Parse market data request"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
-        con_id, index = self.read_int(fields, index)
-        symbol, index = self.read_str(fields, index)
-        sec_type, index = self.read_str(fields, index)
-        expiry, index = self.read_str(fields, index)
-        strike, index = self.read_float(fields, index)
-        right, index = self.read_str(fields, index)
-        multiplier, index = self.read_int(fields, index)
-        exchange, index = self.read_str(fields, index)
-        primary_exchange, index = self.read_str(fields, index)
-        currency, index = self.read_str(fields, index)
-        local_symbol, index = self.read_str(fields, index)
-        trading_class, index = self.read_str(fields, index)
+        req_id = _read_int(it)
+        contract = _read_contract(it)
         
         # Generic tick list
-        generic_tick_list, index = self.read_str(fields, index)
-        snapshot, index = self.read_bool(fields, index)
-        regulatory_snapshot, index = self.read_bool(fields, index)
-        mkt_data_options, index = self.read_str(fields, index)
+        generic_tick_list = _read_str(it)
+        snapshot = _read_bool(it)
+        regulatory_snapshot = _read_bool(it)
+        mkt_data_options = _read_str(it)
         
-        return {
-            'req_id': req_id,
-            'contract': {
-                'con_id': con_id,
-                'symbol': symbol,
-                'sec_type': sec_type,
-                'expiry': expiry,
-                'strike': strike,
-                'right': right,
-                'multiplier': multiplier,
-                'exchange': exchange,
-                'primary_exchange': primary_exchange,
-                'currency': currency,
-                'local_symbol': local_symbol,
-                'trading_class': trading_class
-            },
-            'generic_tick_list': generic_tick_list,
-            'snapshot': snapshot,
-            'regulatory_snapshot': regulatory_snapshot,
-            'mkt_data_options': mkt_data_options
-        }
+        return ReqMktDataMsg(
+            req_id=req_id,
+            contract=contract,
+            generic_tick_list=generic_tick_list,
+            snapshot=snapshot,
+            regulatory_snapshot=regulatory_snapshot,
+            mkt_data_options=mkt_data_options
+        )
     
-    def parse_cancel_mkt_data(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_cancel_mkt_data(self, it: Iterator[str]) -> CancelMktDataMsg:
         """Parse cancel market data request"""
-        req_id, _ = self.read_int(fields, 0)
-        return {'req_id': req_id}
+        req_id = _read_int(it)
+        return CancelMktDataMsg(req_id)
     
-    def parse_place_order(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_place_order(self, it: Iterator[str]) -> PlaceOrderMsg:
         """Parse place order request (simplified)"""
-        index = 0
-        order_id, index = self.read_int(fields, index)
+        order_id = _read_int(it)
         
         # Contract
-        con_id, index = self.read_int(fields, index)
-        symbol, index = self.read_str(fields, index)
-        sec_type, index = self.read_str(fields, index)
-        expiry, index = self.read_str(fields, index)
-        strike, index = self.read_float(fields, index)
-        right, index = self.read_str(fields, index)
-        multiplier, index = self.read_int(fields, index)
-        exchange, index = self.read_str(fields, index)
-        primary_exchange, index = self.read_str(fields, index)
-        currency, index = self.read_str(fields, index)
-        local_symbol, index = self.read_str(fields, index)
-        trading_class, index = self.read_str(fields, index)
-        sec_id_type, index = self.read_str(fields, index)
-        sec_id, index = self.read_str(fields, index)
+        contract = _read_contract(it)
+        sec_id_type = _read_str(it)
+        sec_id = _read_str(it)
         
         # Order
-        action, index = self.read_str(fields, index)
-        total_quantity, index = self.read_float(fields, index)
-        order_type, index = self.read_str(fields, index)
-        limit_price, index = self.read_float(fields, index)
-        aux_price, index = self.read_float(fields, index)
-        tif, index = self.read_str(fields, index)
-        oca_group, index = self.read_str(fields, index)
-        account, index = self.read_str(fields, index)
-        open_close, index = self.read_str(fields, index)
-        origin, index = self.read_int(fields, index)
-        order_ref, index = self.read_str(fields, index)
-        transmit, index = self.read_bool(fields, index)
-        parent_id, index = self.read_int(fields, index)
+        action = _read_interned_str(it)
+        total_quantity = _read_float(it)
+        order_type = _read_interned_str(it)
+        limit_price = _read_float(it)
+        aux_price = _read_float(it)
+        tif = _read_interned_str(it)
+        oca_group = _read_str(it)
+        account = _read_str(it)
+        open_close = _read_str(it)
+        origin = _read_int(it)
+        order_ref = _read_str(it)
+        transmit = _read_bool(it)
+        parent_id = _read_int(it)
         
-        return {
-            'order_id': order_id,
-            'contract': {
-                'con_id': con_id,
-                'symbol': symbol,
-                'sec_type': sec_type,
-                'expiry': expiry,
-                'strike': strike,
-                'right': right,
-                'multiplier': multiplier,
-                'exchange': exchange,
-                'primary_exchange': primary_exchange,
-                'currency': currency,
-                'local_symbol': local_symbol,
-                'trading_class': trading_class
-            },
-            'order': {
-                'action': action,
-                'total_quantity': total_quantity,
-                'order_type': order_type,
-                'limit_price': limit_price,
-                'aux_price': aux_price,
-                'tif': tif,
-                'oca_group': oca_group,
-                'account': account,
-                'open_close': open_close,
-                'origin': origin,
-                'order_ref': order_ref,
-                'transmit': transmit,
-                'parent_id': parent_id
-            }
-        }
+        return PlaceOrderMsg(
+            order_id=order_id,
+            contract=contract,
+            order=OrderMsg(
+                action, total_quantity, order_type, limit_price, aux_price,
+                tif, oca_group, account, open_close, origin, order_ref,
+                transmit, parent_id
+            )
+        )
     
-    def parse_cancel_order(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_cancel_order(self, it: Iterator[str]) -> CancelOrderMsg:
         """Parse cancel order request"""
-        order_id, _ = self.read_int(fields, 0)
-        return {'order_id': order_id}
+        order_id = _read_int(it)
+        return CancelOrderMsg(order_id)
     
-    def parse_req_open_orders(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_open_orders(self, it: Iterator[str]) -> EmptyMsg:
         """Parse request open orders"""
-        return {}  # No parameters
+        return _EMPTY_MSG  # No parameters
     
-    def parse_req_acct_data(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_acct_data(self, it: Iterator[str]) -> ReqAcctDataMsg:
         """Parse request account data"""
-        index = 0
-        subscribe, index = self.read_bool(fields, index)
-        account_code, index = self.read_str(fields, index)
+        subscribe = _read_bool(it)
+        account_code = _read_str(it)
         
-        return {
-            'subscribe': subscribe,
-            'account_code': account_code
-        }
+        return ReqAcctDataMsg(
+            subscribe=subscribe,
+            account_code=account_code
+        )
     
-    def parse_req_positions(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_positions(self, it: Iterator[str]) -> EmptyMsg:
         """Parse request positions"""
-        return {}  # No parameters in basic version
+        return _EMPTY_MSG  # No parameters in basic version
     
-    def parse_req_positions_multi(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_positions_multi(self, it: Iterator[str]) -> ReqPositionsMultiMsg:
         """Parse request positions multi"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
-        account, index = self.read_str(fields, index)
-        model_code, index = self.read_str(fields, index)
+        req_id = _read_int(it)
+        account = _read_str(it)
+        model_code = _read_str(it)
         
-        return {
-            'req_id': req_id,
-            'account': account,
-            'model_code': model_code
-        }
+        return ReqPositionsMultiMsg(
+            req_id=req_id,
+            account=account,
+            model_code=model_code
+        )
     
-    def parse_req_contract_details(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_contract_details(self, it: Iterator[str]) -> ReqContractDetailsMsg:
         """Parse request contract details"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
+        req_id = _read_int(it)
         
         # Contract fields
-        con_id, index = self.read_int(fields, index)
-        symbol, index = self.read_str(fields, index)
-        sec_type, index = self.read_str(fields, index)
-        expiry, index = self.read_str(fields, index)
-        strike, index = self.read_float(fields, index)
-        right, index = self.read_str(fields, index)
-        multiplier, index = self.read_int(fields, index)
-        exchange, index = self.read_str(fields, index)
-        primary_exchange, index = self.read_str(fields, index)
-        currency, index = self.read_str(fields, index)
-        local_symbol, index = self.read_str(fields, index)
-        trading_class, index = self.read_str(fields, index)
-        include_expired, index = self.read_bool(fields, index)
+        contract = _read_contract(it)
+        include_expired = _read_bool(it)
         
-        return {
-            'req_id': req_id,
-            'contract': {
-                'con_id': con_id,
-                'symbol': symbol,
-                'sec_type': sec_type,
-                'expiry': expiry,
-                'strike': strike,
-                'right': right,
-                'multiplier': multiplier,
-                'exchange': exchange,
-                'primary_exchange': primary_exchange,
-                'currency': currency,
-                'local_symbol': local_symbol,
-                'trading_class': trading_class
-            },
-            'include_expired': include_expired
-        }
+        return ReqContractDetailsMsg(
+            req_id=req_id,
+            contract=contract,
+            include_expired=include_expired
+        )
     
-    def parse_req_sec_def_opt_params(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_sec_def_opt_params(self, it: Iterator[str]) -> ReqSecDefOptParamsMsg:
         """Parse request security definition option parameters"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
-        underlying_symbol, index = self.read_str(fields, index)
-        fut_fop_exchange, index = self.read_str(fields, index)
-        underlying_sec_type, index = self.read_str(fields, index)
-        underlying_con_id, index = self.read_int(fields, index)
+        req_id = _read_int(it)
+        underlying_symbol = _read_interned_str(it)
+        fut_fop_exchange = _read_interned_str(it)
+        underlying_sec_type = _read_interned_str(it)
+        underlying_con_id = _read_int(it)
         
-        return {
-            'req_id': req_id,
-            'underlying_symbol': underlying_symbol,
-            'fut_fop_exchange': fut_fop_exchange,
-            'underlying_sec_type': underlying_sec_type,
-            'underlying_con_id': underlying_con_id
-        }
+        return ReqSecDefOptParamsMsg(
+            req_id=req_id,
+            underlying_symbol=underlying_symbol,
+            fut_fop_exchange=fut_fop_exchange,
+            underlying_sec_type=underlying_sec_type,
+            underlying_con_id=underlying_con_id
+        )
     
-    def parse_req_executions(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_executions(self, it: Iterator[str]) -> ReqExecutionsMsg:
         """Parse request executions"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
+        req_id = _read_int(it)
         
         # Execution filter
-        client_id, index = self.read_int(fields, index)
-        account_code, index = self.read_str(fields, index)
-        time, index = self.read_str(fields, index)
-        symbol, index = self.read_str(fields, index)
-        sec_type, index = self.read_str(fields, index)
-        exchange, index = self.read_str(fields, index)
-        side, index = self.read_str(fields, index)
+        client_id = _read_int(it)
+        account_code = _read_str(it)
+        time = _read_str(it)
+        symbol = _read_interned_str(it)
+        sec_type = _read_interned_str(it)
+        exchange = _read_interned_str(it)
+        side = _read_str(it)
         
-        return {
-            'req_id': req_id,
-            'filter': {
-                'client_id': client_id,
-                'account_code': account_code,
-                'time': time,
-                'symbol': symbol,
-                'sec_type': sec_type,
-                'exchange': exchange,
-                'side': side
-            }
-        }
+        return ReqExecutionsMsg(
+            req_id=req_id,
+            filter=ExecutionFilterMsg(
+                client_id, account_code, time, symbol, sec_type, exchange, side
+            )
+        )
     
-    def parse_req_ids(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_ids(self, it: Iterator[str]) -> ReqIdsMsg:
         """Parse request IDs"""
-        num_ids = 1  # Default
-        if fields:
-            num_ids, _ = self.read_int(fields, 0)
-        return {'num_ids': num_ids}
+        value = next(it, None)
+        if value is None:
+            return ReqIdsMsg(1)  # Default
+        return ReqIdsMsg(_to_int(value))
     
-    def parse_req_managed_accts(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_managed_accts(self, it: Iterator[str]) -> EmptyMsg:
         """Parse request managed accounts"""
-        return {}  # No parameters
+        return _EMPTY_MSG  # No parameters
     
-    def parse_req_current_time(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_current_time(self, it: Iterator[str]) -> EmptyMsg:
         """Parse request current time"""
-        return {}  # No parameters
+        return _EMPTY_MSG  # No parameters
     
-    def parse_req_historical_data(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_req_historical_data(self, it: Iterator[str]) -> ReqHistoricalDataMsg:
         """Parse request historical data"""
-        index = 0
-        req_id, index = self.read_int(fields, index)
+        req_id = _read_int(it)
         
         # Contract
-        con_id, index = self.read_int(fields, index)
-        symbol, index = self.read_str(fields, index)
-        sec_type, index = self.read_str(fields, index)
-        expiry, index = self.read_str(fields, index)
-        strike, index = self.read_float(fields, index)
-        right, index = self.read_str(fields, index)
-        multiplier, index = self.read_int(fields, index)
-        exchange, index = self.read_str(fields, index)
-        primary_exchange, index = self.read_str(fields, index)
-        currency, index = self.read_str(fields, index)
-        local_symbol, index = self.read_str(fields, index)
-        trading_class, index = self.read_str(fields, index)
-        include_expired, index = self.read_bool(fields, index)
+        contract = _read_contract(it)
+        include_expired = _read_bool(it)
         
         # Historical data parameters
-        end_date_time, index = self.read_str(fields, index)
-        bar_size_setting, index = self.read_str(fields, index)
-        duration_str, index = self.read_str(fields, index)
-        use_rth, index = self.read_bool(fields, index)
-        what_to_show, index = self.read_str(fields, index)
-        format_date, index = self.read_int(fields, index)
+        end_date_time = _read_str(it)
+        bar_size_setting = _read_str(it)
+        duration_str = _read_str(it)
+        use_rth = _read_bool(it)
+        what_to_show = _read_str(it)
+        format_date = _read_int(it)
         
-        return {
-            'req_id': req_id,
-            'contract': {
-                'con_id': con_id,
-                'symbol': symbol,
-                'sec_type': sec_type,
-                'expiry': expiry,
-                'strike': strike,
-                'right': right,
-                'multiplier': multiplier,
-                'exchange': exchange,
-                'primary_exchange': primary_exchange,
-                'currency': currency,
-                'local_symbol': local_symbol,
-                'trading_class': trading_class
-            },
-            'end_date_time': end_date_time,
-            'bar_size_setting': bar_size_setting,
-            'duration_str': duration_str,
-            'use_rth': use_rth,
-            'what_to_show': what_to_show,
-            'format_date': format_date
-        }
+        return ReqHistoricalDataMsg(
+            req_id=req_id,
+            contract=contract,
+            end_date_time=end_date_time,
+            bar_size_setting=bar_size_setting,
+            duration_str=duration_str,
+            use_rth=use_rth,
+            what_to_show=what_to_show,
+            format_date=format_date
+        )
     
-    def parse_start_api(self, fields: List[str]) -> Dict[str, Any]:
+    def parse_start_api(self, it: Iterator[str]) -> StartApiMsg:
         """Parse start API request"""
-        index = 0
-        client_id, index = self.read_int(fields, index)
-        optional_capabilities, index = self.read_str(fields, index)
+        client_id = _read_int(it)
+        optional_capabilities = _read_str(it)
         
-        return {
-            'client_id': client_id,
-            'optional_capabilities': optional_capabilities
-        }
+        return StartApiMsg(
+            client_id=client_id,
+            optional_capabilities=optional_capabilities
+        )
     
-    def parse_message(self, msg_id: int, fields: List[str]) -> Dict[str, Any]:
-        """Parse message based on ID"""
-        parsers = {
-            IncomingMessageIds.REQ_MKT_DATA: self.parse_req_mkt_data,
-            IncomingMessageIds.CANCEL_MKT_DATA: self.parse_cancel_mkt_data,
-            IncomingMessageIds.PLACE_ORDER: self.parse_place_order,
-            IncomingMessageIds.CANCEL_ORDER: self.parse_cancel_order,
-            IncomingMessageIds.REQ_OPEN_ORDERS: self.parse_req_open_orders,
-            IncomingMessageIds.REQ_ACCT_DATA: self.parse_req_acct_data,
-            IncomingMessageIds.REQ_POSITIONS: self.parse_req_positions,
-            IncomingMessageIds.REQ_POSITIONS_MULTI: self.parse_req_positions_multi,
-            IncomingMessageIds.REQ_CONTRACT_DATA: self.parse_req_contract_details,
-            IncomingMessageIds.REQ_SEC_DEF_OPT_PARAMS: self.parse_req_sec_def_opt_params,
-            IncomingMessageIds.REQ_EXECUTIONS: self.parse_req_executions,
-            IncomingMessageIds.REQ_IDS: self.parse_req_ids,
-            IncomingMessageIds.REQ_MANAGED_ACCTS: self.parse_req_managed_accts,
-            IncomingMessageIds.REQ_CURRENT_TIME: self.parse_req_current_time,
-            IncomingMessageIds.REQ_HISTORICAL_DATA: self.parse_req_historical_data,
-            IncomingMessageIds.START_API: self.parse_start_api,
-        }
-        
-        parser = parsers.get(msg_id)
+    def parse_message(self, msg_id: int, fields: List[str]) -> Optional[tuple]:
+        """Parse message based on ID, returning None if it cannot be parsed"""
+        parser = self._parsers.get(msg_id)
         if parser:
             try:
-                return parser(fields)
+                return parser(iter(fields))
             except Exception as e:
                 logger.error(f"Failed to parse message {msg_id}: {e}")
-                return {}
+                return None
         else:
             logger.warning(f"No parser for message ID {msg_id}")
-            return {}
\ No newline at end of file
+            return None
\ No newline at end of file
@@ -3,51 +3,133 @@ IB Protocol Message Encoder
 Encodes messages according to IB TWS API protocol
 """
 
-import struct
 import logging
-from typing import List, Union, Optional, Any, Dict
+from functools import lru_cache
+from typing import List, Union, Optional, Any, Dict, Tuple
 from datetime import datetime
 
+from .framing import LENGTH_PREFIX
 from .message_ids import OutgoingMessageIds
 
 logger = logging.getLogger(__name__)
 
+# Encoded message ID field for every outgoing message type
+_MSG_ID_PREFIX: Dict[int, bytes] = {
+    msg_id: str(msg_id).encode('ascii') + b'\x00'
+    for name, msg_id in vars(OutgoingMessageIds).items()
+    if not name.startswith('_') and isinstance(msg_id, int)
+}
+
+
+# One-pass bytes formats for fixed-arity messages: %d for IDs, codes and
+# flags, %r for prices and sizes (same text as str() for int and float),
+# %s for strings encoded by the caller. %d would silently truncate a
+# float, so callers only take a format when every %d argument is an int
+# (or a bool, for flags); anything else goes through the generic encoder.
+_NUMBER_TYPES = (int, float)
+_FLAG_TYPES = (bool, int)
+_NEXT_VALID_ID_FORMAT = _MSG_ID_PREFIX[OutgoingMessageIds.NEXT_VALID_ID] + b'%d\x00'
+_ERR_MSG_FORMAT = _MSG_ID_PREFIX[OutgoingMessageIds.ERR_MSG] + b'%d\x00%d\x00%s\x00'
+_TICK_PRICE_FORMAT = _MSG_ID_PREFIX[OutgoingMessageIds.TICK_PRICE] + b'%d\x00%d\x00%r\x00%d\x00%d\x00'
+_TICK_SIZE_FORMAT = _MSG_ID_PREFIX[OutgoingMessageIds.TICK_SIZE] + b'%d\x00%d\x00%r\x00'
+_ORDER_STATUS_FORMAT = (
+    _MSG_ID_PREFIX[OutgoingMessageIds.ORDER_STATUS] +
+    b'%d\x00%s\x00%r\x00%r\x00%r\x00%d\x00%d\x00%r\x00%d\x00%s\x00%r\x00'
+)
+_CURRENT_TIME_FORMAT = _MSG_ID_PREFIX[OutgoingMessageIds.CURRENT_TIME] + b'%d\x00'
+
+
+def _framed(message: bytes) -> bytes:
+    """Prepend the length prefix to an encoded message body"""
+    return LENGTH_PREFIX.pack(len(message)) + message
+
+
+@lru_cache(maxsize=1024)
+def _req_end_marker(msg_id: int, req_id: int) -> bytes:
+    """Encode an end marker whose only field is an integer request ID"""
+    return _framed(_MSG_ID_PREFIX[msg_id] + b'%d\x00' % req_id)
+
 
 class MessageEncoder:
     """Encodes messages for IB TWS API protocol"""
     
     def __init__(self, encoding: str = 'latin-1'):
         self.encoding = encoding
+        
+        # Field encoders by exact type, so bool is never mistaken for int
+        def encode_str(field: str) -> bytes:
+            return field.encode(encoding) + b'\x00'
+        
+        # Numbers are formatted straight to bytes; %r of a float is the
+        # same text as str()
+        self._field_encoders = {
+            str: encode_str,
+            int: lambda field: b'%d\x00' % field,
+            float: lambda field: b'%r\x00' % field,
+            bool: lambda field: b'1\x00' if field else b'0\x00',
+            type(None): lambda field: b'\x00',
+            datetime: lambda field: field.strftime('%Y%m%d %H:%M:%S').encode(encoding) + b'\x00',
+        }
+        
+        # Field-less end markers never change
+        self._position_end = self.make_message(OutgoingMessageIds.POSITION_END, [])
+        self._open_order_end = self.make_message(OutgoingMessageIds.OPEN_ORDER_END, [])
     
     def encode_fields(self, fields: List[Any]) -> bytes:
         """Encode a list of fields into IB protocol format"""
-        message = b''
-        
-        for field in fields:
-            if field is None:
-                # Empty field
-                message += b'\x00'
-            elif isinstance(field, bool):
-                # Boolean as 1 or 0
-                message += (b'1' if field else b'0') + b'\x00'
-            elif isinstance(field, (int, float)):
-                # Numbers as strings
-                message += str(field).encode(self.encoding) + b'\x00'
-            elif isinstance(field, datetime):
-                # Datetime as formatted string
-                message += field.strftime('%Y%m%d %H:%M:%S').encode(self.encoding) + b'\x00'
-            else:
-                # Everything else as string
-                message += str(field).encode(self.encoding) + b'\x00'
+        return b''.join(self.encode_fields_parts(fields))
+    
+    def encode_fields_parts(self, fields: List[Any]) -> Tuple[bytes, bytes]:
+        """Encode fields as separate (length prefix, body) parts for a gather write"""
+        message = self._encode_body(fields)
         
-        # Prepend message length (4 bytes, big-endian)
-        length = len(message)
-        return struct.pack('>I', length) + message
+        # Message length (4 bytes, big-endian)
+        return LENGTH_PREFIX.pack(len(message)), message
+    
+    def _encode_body(self, fields: List[Any]) -> bytes:
+        """Encode fields as null-terminated values without the length prefix"""
+        # One exact-type lookup per field; subclasses and other types take
+        # the isinstance ladder in _encode_field
+        encoders = self._field_encoders
+        fallback = self._encode_field
+        return b''.join([encoders.get(type(field), fallback)(field) for field in fields])
+    
+    def _encode_field(self, field: Any) -> bytes:
+        """Encode a single field as a null-terminated value"""
+        if field is None:
+            # Empty field
+            return b'\x00'
+        elif isinstance(field, bool):
+            # Boolean as 1 or 0
+            return b'1\x00' if field else b'0\x00'
+        elif isinstance(field, (int, float)):
+            # Numbers as strings
+            return str(field).encode(self.encoding) + b'\x00'
+        elif isinstance(field, datetime):
+            # Datetime as formatted string
+            return field.strftime('%Y%m%d %H:%M:%S').encode(self.encoding) + b'\x00'
+        else:
+            # Everything else as string
+            return str(field).encode(self.encoding) + b'\x00'
     
     def make_message(self, msg_id: int, fields: List[Any]) -> bytes:
         """Create a complete message with ID and fields"""
-        all_fields = [msg_id] + fields
-        return self.encode_fields(all_fields)
+        return b''.join(self.make_message_parts(msg_id, fields))
+    
+    def make_message_parts(self, msg_id: int, fields: List[Any]) -> List[bytes]:
+        """Create a message as separate length, ID and field parts for a gather write"""
+        prefix = _MSG_ID_PREFIX.get(msg_id)
+        if prefix is None:
+            prefix = self._encode_body([msg_id])
+        
+        body = self._encode_body(fields)
+        return [LENGTH_PREFIX.pack(len(prefix) + len(body)), prefix, body]
+    
+    def _req_end(self, msg_id: int, req_id: int) -> bytes:
+        """Encode an end marker for a request, cached for integer IDs"""
+        if type(req_id) is int:
+            return _req_end_marker(msg_id, req_id)
+        return self.make_message(msg_id, [req_id])
     
     # Connection messages
     def server_version(self, version: int = 176, connection_time: str = None) -> bytes:
@@ -61,6 +143,8 @@ class MessageEncoder:
     
     def next_valid_id(self, order_id: int) -> bytes:
         """Send next valid order ID"""
+        if type(order_id) is int:
+            return _framed(_NEXT_VALID_ID_FORMAT % (order_id,))
         return self.make_message(OutgoingMessageIds.NEXT_VALID_ID, [order_id])
     
     def managed_accounts(self, accounts: str) -> bytes:
@@ -69,6 +153,10 @@ class MessageEncoder:
     
     def error_message(self, req_id: int, error_code: int, error_msg: str) -> bytes:
         """Send error message"""
+        if type(req_id) is int and type(error_code) is int and type(error_msg) is str:
+            return _framed(_ERR_MSG_FORMAT % (
+                req_id, error_code, error_msg.encode(self.encoding)
+            ))
         return self.make_message(OutgoingMessageIds.ERR_MSG, [
             req_id, error_code, error_msg
         ])
@@ -77,6 +165,14 @@ class MessageEncoder:
     def tick_price(self, req_id: int, tick_type: int, price: float, 
                    can_auto_execute: bool = True, past_limit: bool = False) -> bytes:
         """Send tick price update"""
+        if (type(req_id) is int and type(tick_type) is int
+                and type(price) in _NUMBER_TYPES
+                and type(can_auto_execute) in _FLAG_TYPES
+                and type(past_limit) in _FLAG_TYPES):
+            return _framed(_TICK_PRICE_FORMAT % (
+                req_id, tick_type, price, can_auto_execute, past_limit
+            ))
+        
         fields = [req_id, tick_type, price]
         
         # Version 2 fields
@@ -84,8 +180,34 @@ class MessageEncoder:
         
         return self.make_message(OutgoingMessageIds.TICK_PRICE, fields)
     
+    def tick_price_template(self, req_id: int, tick_type: int,
+                            can_auto_execute: bool = True,
+                            past_limit: bool = False) -> Tuple[bytes, bytes]:
+        """Pre-encode the fixed fields of a tick price around the price"""
+        return (
+            self._encode_body([OutgoingMessageIds.TICK_PRICE, req_id, tick_type]),
+            self._encode_body([can_auto_execute, past_limit])
+        )
+    
+    def tick_size_template(self, req_id: int, tick_type: int) -> Tuple[bytes, bytes]:
+        """Pre-encode the fixed fields of a tick size before the size"""
+        return self._encode_body([OutgoingMessageIds.TICK_SIZE, req_id, tick_type]), b''
+    
+    def fill_encoded(self, template: Tuple[bytes, bytes], field: bytes) -> bytes:
+        """Complete a pre-encoded (head, tail) template with an already encoded field"""
+        head, tail = template
+        message = head + field + tail
+        return LENGTH_PREFIX.pack(len(message)) + message
+    
+    def encode_field_map(self, values: Dict[str, Any]) -> Dict[str, bytes]:
+        """Encode each value of a mapping as a single null-terminated field"""
+        encode_body = self._encode_body
+        return {key: encode_body([value]) for key, value in values.items()}
+    
     def tick_size(self, req_id: int, tick_type: int, size: int) -> bytes:
         """Send tick size update"""
+        if type(req_id) is int and type(tick_type) is int and type(size) in _NUMBER_TYPES:
+            return _framed(_TICK_SIZE_FORMAT % (req_id, tick_type, size))
         return self.make_message(OutgoingMessageIds.TICK_SIZE, [
             req_id, tick_type, size
         ])
@@ -153,7 +275,7 @@ class MessageEncoder:
     
     def position_end(self) -> bytes:
         """Send position data end marker"""
-        return self.make_message(OutgoingMessageIds.POSITION_END, [])
+        return self._position_end
     
     # Order messages
     def open_order(self, order_id: int, con_id: int, symbol: str, sec_type: str,
@@ -236,6 +358,20 @@ class MessageEncoder:
                     parent_id: int, last_fill_price: float, client_id: int,
                     why_held: str, mkt_cap_price: float = 0) -> bytes:
         """Send order status update"""
+        if (type(order_id) is int and type(perm_id) is int
+                and type(parent_id) is int and type(client_id) is int
+                and type(status) is str and type(why_held) is str
+                and type(filled) in _NUMBER_TYPES and type(remaining) in _NUMBER_TYPES
+                and type(avg_fill_price) in _NUMBER_TYPES
+                and type(last_fill_price) in _NUMBER_TYPES
+                and type(mkt_cap_price) in _NUMBER_TYPES):
+            encoding = self.encoding
+            return _framed(_ORDER_STATUS_FORMAT % (
+                order_id, status.encode(encoding), filled, remaining, avg_fill_price,
+                perm_id, parent_id, last_fill_price, client_id,
+                why_held.encode(encoding), mkt_cap_price
+            ))
+        
         fields = [
             order_id, status, filled, remaining, avg_fill_price,
             perm_id, parent_id, last_fill_price, client_id, why_held,
@@ -243,9 +379,25 @@ class MessageEncoder:
         ]
         return self.make_message(OutgoingMessageIds.ORDER_STATUS, fields)
     
+    def order_status_template(self, status: str, client_id: int) -> Tuple[bytes, bytes, bytes]:
+        """Pre-encode an order status with no fills around its order and perm IDs"""
+        return (
+            self._encode_body([OutgoingMessageIds.ORDER_STATUS]),
+            self._encode_body([status, 0, 0, 0]),
+            self._encode_body([0, 0, client_id, '', 0])
+        )
+    
+    def fill_order_status(self, template: Tuple[bytes, bytes, bytes],
+                          order_id: int, perm_id: int) -> bytes:
+        """Complete a pre-encoded order status template"""
+        head, middle, tail = template
+        message = (head + self._encode_body([order_id]) + middle +
+                   self._encode_body([perm_id]) + tail)
+        return LENGTH_PREFIX.pack(len(message)) + message
+    
     def open_order_end(self) -> bytes:
         """Send open orders end marker"""
-        return self.make_message(OutgoingMessageIds.OPEN_ORDER_END, [])
+        return self._open_order_end
     
     # Execution messages
     def execution_data(self, req_id: int, order_id: int, con_id: int,
@@ -269,7 +421,7 @@ class MessageEncoder:
     
     def execution_data_end(self, req_id: int) -> bytes:
         """Send execution data end marker"""
-        return self.make_message(OutgoingMessageIds.EXECUTION_DATA_END, [req_id])
+        return self._req_end(OutgoingMessageIds.EXECUTION_DATA_END, req_id)
     
     # Contract messages
     def contract_data(self, req_id: int, symbol: str, sec_type: str, expiry: str,
@@ -304,7 +456,7 @@ class MessageEncoder:
     
     def contract_data_end(self, req_id: int) -> bytes:
         """Send contract data end marker"""
-        return self.make_message(OutgoingMessageIds.CONTRACT_DATA_END, [req_id])
+        return self._req_end(OutgoingMessageIds.CONTRACT_DATA_END, req_id)
     
     # Options specific
     def security_definition_option_parameter(self, req_id: int, exchange: str,
@@ -329,12 +481,17 @@ class MessageEncoder:
     
     def security_definition_option_parameter_end(self, req_id: int) -> bytes:
         """Send option parameters end marker"""
-        return self.make_message(OutgoingMessageIds.SECURITY_DEFINITION_OPTION_PARAMETER_END, [req_id])
+        return self._req_end(OutgoingMessageIds.SECURITY_DEFINITION_OPTION_PARAMETER_END, req_id)
     
     # Historical data
     def historical_data(self, req_id: int, start_date: str, end_date: str,
                        bar_count: int, bars: List[Dict]) -> bytes:
         """Send historical data bars"""
+        return b''.join(self.historical_data_parts(req_id, start_date, end_date, bar_count, bars))
+    
+    def historical_data_parts(self, req_id: int, start_date: str, end_date: str,
+                              bar_count: int, bars: List[Dict]) -> List[bytes]:
+        """Historical data bars as parts for a gather write, without joining the payload"""
         fields = [req_id, start_date, end_date, bar_count]
         
         # Add each bar
@@ -344,11 +501,13 @@ class MessageEncoder:
                 bar['close'], bar['volume'], bar['wap'], bar['bar_count']
             ])
         
-        return self.make_message(OutgoingMessageIds.HISTORICAL_DATA, fields)
+        return self.make_message_parts(OutgoingMessageIds.HISTORICAL_DATA, fields)
     
     # Current time
     def current_time(self, time: int) -> bytes:
         """Send current server time"""
+        if type(time) is int:
+            return _framed(_CURRENT_TIME_FORMAT % (time,))
         return self.make_message(OutgoingMessageIds.CURRENT_TIME, [time])
     
     # Commission report
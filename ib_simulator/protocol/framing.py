@@ -0,0 +1,9 @@
+"""
+IB Protocol Message Framing
+Length prefix shared by every framed message on the wire
+"""
+
+import struct
+
+# Big-endian 4-byte length prefix in front of every framed message
+LENGTH_PREFIX = struct.Struct('>I')
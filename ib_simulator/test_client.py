@@ -10,6 +10,60 @@ import time
 import sys
 from typing import Optional
 
+# 4-byte big-endian length prefix of every message
+_PACK_LEN = struct.Struct('>I').pack
+_UNPACK_LEN = struct.Struct('>I').unpack_from
+
+
+def _encode_message(fields: list) -> bytes:
+    """Encode fields with IB protocol encoding and a length prefix"""
+    message = b''.join(str(field).encode('latin-1') + b'\x00' for field in fields)
+    return _PACK_LEN(len(message)) + message
+
+
+# Requests the client sends are constant, so they are encoded once here
+
+# START_API = 71
+# Fields: msg_id, client_id, optional_capabilities
+_START_API_FIELDS = [71, 1, ""]
+_START_API_MSG = _encode_message(_START_API_FIELDS)
+
+# REQ_MKT_DATA = 1
+# Fields: msg_id, req_id, con_id, symbol, sec_type, expiry, strike, 
+#         right, multiplier, exchange, primary_exchange, currency,
+#         local_symbol, trading_class, generic_tick_list, snapshot,
+#         regulatory_snapshot, mkt_data_options
+_REQ_NVDA_MKT_DATA_FIELDS = [
+    1,      # msg_id
+    100,    # req_id
+    0,      # con_id
+    "NVDA", # symbol
+    "STK",  # sec_type
+    "",     # expiry
+    0,      # strike
+    "",     # right
+    1,      # multiplier
+    "SMART",# exchange
+    "",     # primary_exchange
+    "USD",  # currency
+    "",     # local_symbol
+    "",     # trading_class
+    "",     # generic_tick_list
+    0,      # snapshot
+    0,      # regulatory_snapshot
+    ""      # mkt_data_options
+]
+_REQ_NVDA_MKT_DATA_MSG = _encode_message(_REQ_NVDA_MKT_DATA_FIELDS)
+
+# REQ_ACCT_DATA = 6
+# Fields: msg_id, subscribe, account_code
+_REQ_ACCT_DATA_FIELDS = [
+    6,   # msg_id
+    1,   # subscribe (true)
+    ""   # account_code (default)
+]
+_REQ_ACCT_DATA_MSG = _encode_message(_REQ_ACCT_DATA_FIELDS)
+
 
 class TestIBClient:
     """Simple test client for IB Simulator"""
@@ -29,10 +83,15 @@ class TestIBClient:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((self.host, self.port))
             
+            # Protocol frames are small and latency sensitive; don't let
+            # Nagle hold them back
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            
             # Send initial handshake (IB API protocol)
             # Send "API\0" followed by version range
             handshake = b'API\x00v100..176\x00'
-            self.socket.send(handshake)
+            self.socket.sendall(handshake)
             
             # Receive server version
             data = self.socket.recv(1024)
@@ -52,31 +111,23 @@ class TestIBClient:
             
     def _send_start_api(self):
         """Send START_API message"""
-        # Message ID 71 = START_API
-        # Fields: client_id, optional_capabilities
-        fields = [71, 1, ""]  # msg_id, client_id, capabilities
-        self._send_message(fields)
+        self._send_message(_START_API_FIELDS, _START_API_MSG)
         
-    def _send_message(self, fields: list):
-        """Send a message with IB protocol encoding"""
-        # Encode fields
-        message = b''
-        for field in fields:
-            if isinstance(field, int):
-                message += str(field).encode('latin-1') + b'\x00'
-            else:
-                message += str(field).encode('latin-1') + b'\x00'
-        
-        # Prepend length
-        length = len(message)
-        full_message = struct.pack('>I', length) + message
+    def _send_message(self, fields: list, full_message: Optional[bytes] = None):
+        """Send a message with IB protocol encoding, reusing a pre-encoded copy if given"""
+        if full_message is None:
+            full_message = _encode_message(fields)
         
         print(f"Sending message: {fields}")
-        self.socket.send(full_message)
-        
+        self.socket.sendall(full_message)
+    
     def _receive_loop(self):
         """Receive and display messages"""
-        buffer = b''
+        # Received bytes are appended in place and consumed through a read
+        # offset; the consumed front is only dropped once it is over half
+        # the buffer, so each byte is copied a bounded number of times
+        buffer = bytearray()
+        offset = 0
         
         print("\nListening for messages (press Ctrl+C to stop)...")
         
@@ -90,25 +141,31 @@ class TestIBClient:
                 
                 buffer += data
                 
-                # Process complete messages
-                while len(buffer) >= 4:
-                    # Get message length
-                    msg_length = struct.unpack('>I', buffer[:4])[0]
-                    
-                    if len(buffer) < 4 + msg_length:
-                        break
-                    
-                    # Extract message
-                    message = buffer[4:4 + msg_length]
-                    buffer = buffer[4 + msg_length:]
-                    
-                    # Decode and display
-                    fields = message.split(b'\x00')[:-1]  # Remove trailing empty
-                    decoded = [f.decode('latin-1') for f in fields]
-                    
-                    if decoded:
-                        msg_id = decoded[0]
-                        print(f"\nReceived message ID {msg_id}: {decoded[1:]}")
+                # Process complete messages; the view must be released
+                # before the buffer is resized again
+                with memoryview(buffer) as view:
+                    while len(buffer) - offset >= 4:
+                        # Get message length
+                        msg_length = _UNPACK_LEN(buffer, offset)[0]
+                        
+                        end = offset + 4 + msg_length
+                        if len(buffer) < end:
+                            break
+                        
+                        # Decode the whole message once straight from the
+                        # buffer, then split it into fields
+                        decoded = str(view[offset + 4:end], 'latin-1').split('\x00')[:-1]
+                        offset = end
+                        
+                        # Display
+                        if decoded:
+                            msg_id = decoded[0]
+                            print(f"\nReceived message ID {msg_id}: {decoded[1:]}")
+                
+                # Compact once the consumed prefix dominates the buffer
+                if offset and offset * 2 >= len(buffer):
+                    del buffer[:offset]
+                    offset = 0
                         
         except KeyboardInterrupt:
             print("\nStopping...")
@@ -120,33 +177,7 @@ class TestIBClient:
             
         print("\nRequesting market data for NVDA...")
         
-        # REQ_MKT_DATA = 1
-        # Fields: msg_id, req_id, con_id, symbol, sec_type, expiry, strike, 
-        #         right, multiplier, exchange, primary_exchange, currency,
-        #         local_symbol, trading_class, generic_tick_list, snapshot,
-        #         regulatory_snapshot, mkt_data_options
-        fields = [
-            1,      # msg_id
-            100,    # req_id
-            0,      # con_id
-            "NVDA", # symbol
-            "STK",  # sec_type
-            "",     # expiry
-            0,      # strike
-            "",     # right
-            1,      # multiplier
-            "SMART",# exchange
-            "",     # primary_exchange
-            "USD",  # currency
-            "",     # local_symbol
-            "",     # trading_class
-            "",     # generic_tick_list
-            0,      # snapshot
-            0,      # regulatory_snapshot
-            ""      # mkt_data_options
-        ]
-        
-        self._send_message(fields)
+        self._send_message(_REQ_NVDA_MKT_DATA_FIELDS, _REQ_NVDA_MKT_DATA_MSG)
         
     def test_account_data(self):
         """Test account data request"""
@@ -155,15 +186,7 @@ class TestIBClient:
             
         print("\nRequesting account data...")
         
-        # REQ_ACCT_DATA = 6
-        # Fields: msg_id, subscribe, account_code
-        fields = [
-            6,   # msg_id
-            1,   # subscribe (true)
-            ""   # account_code (default)
-        ]
-        
-        self._send_message(fields)
+        self._send_message(_REQ_ACCT_DATA_FIELDS, _REQ_ACCT_DATA_MSG)
         
     def disconnect(self):
         """Disconnect from server"""
@@ -34,6 +34,9 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "uvloop": ["uvloop>=0.17.0; sys_platform != 'win32'"],
+    },
     entry_points={
         "console_scripts": [
             "ib-simulator=ib_simulator.main:main",
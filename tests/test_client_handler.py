@@ -0,0 +1,159 @@
+"""
+Tests for ClientHandler outbound queueing
+"""
+
+import asyncio
+import copy
+import os
+import unittest
+
+import yaml
+
+from ib_simulator.core.client_handler import ClientHandler
+from ib_simulator.protocol.decoder import CancelOrderMsg, ContractMsg, ReqMktDataMsg
+
+_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'ib_simulator', 'config.yaml')
+
+with open(_CONFIG_PATH, 'r') as f:
+    _BASE_CONFIG = yaml.safe_load(f)
+
+
+def _make_config(**protocol) -> dict:
+    """Packaged config with protocol overrides"""
+    config = copy.deepcopy(_BASE_CONFIG)
+    config['protocol'].update(protocol)
+    return config
+
+
+class FakeWriter:
+    """StreamWriter stand-in whose drain() blocks until released"""
+
+    def __init__(self):
+        self.written = []
+        self.drained = asyncio.Event()
+        self.drained.set()
+        self.closed = False
+
+    def writelines(self, frames):
+        self.written.extend(frames)
+
+    async def drain(self):
+        await self.drained.wait()
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+def _contract(symbol: str) -> ContractMsg:
+    return ContractMsg(0, symbol, 'STK', '', 0.0, '', 1, 'SMART', '', 'USD', '', '')
+
+
+class OutboundQueueTest(unittest.TestCase):
+    """Senders are throttled once a client stops draining"""
+
+    def _run(self, coro):
+        return asyncio.run(coro)
+
+    async def _start(self, max_outbound_queue: int):
+        writer = FakeWriter()
+        handler = ClientHandler(
+            client_id=1, reader=None, writer=writer, server=None,
+            config=_make_config(max_outbound_queue=max_outbound_queue)
+        )
+        handler._writer_task = asyncio.create_task(handler._writer_loop())
+        return handler, writer
+
+    def test_sender_waits_past_high_water_mark(self):
+        async def scenario():
+            handler, writer = await self._start(max_outbound_queue=4)
+            writer.drained.clear()
+
+            # The first frame is taken by the writer, which then stalls
+            await handler._send_raw(b'first')
+            await asyncio.sleep(0)
+
+            send = asyncio.ensure_future(handler._send_many([b'x'] * 5))
+            await asyncio.sleep(0.05)
+            self.assertFalse(send.done())
+
+            writer.drained.set()
+            await asyncio.wait_for(send, 1.0)
+            await asyncio.sleep(0)
+            self.assertEqual(writer.written, [b'first'] + [b'x'] * 5)
+            await handler.close()
+
+        self._run(scenario())
+
+    def test_market_data_dropped_while_stalled(self):
+        async def scenario():
+            handler, writer = await self._start(max_outbound_queue=10)
+            await handler._handle_req_market_data(ReqMktDataMsg(
+                7, _contract('NVDA'), '', False, False, ''
+            ))
+            await asyncio.sleep(0)
+            sent = len(writer.written)
+
+            writer.drained.clear()
+            await handler._send_raw(b'stall')
+            await asyncio.sleep(0)
+            handler._enqueue_many([b'backlog'] * 10)
+
+            fields = handler.encoder.encode_field_map({'bid': 1.5, 'ask': 1.6})
+            handler.enqueue_market_data('NVDA', fields)
+            self.assertEqual(len(handler._outq), 10)
+
+            # Once caught up, updates flow again
+            writer.drained.set()
+            await asyncio.sleep(0.01)
+            handler.enqueue_market_data('NVDA', fields)
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(writer.written), sent + 1 + 10 + 2)
+            await handler.close()
+
+        self._run(scenario())
+
+
+class DelayedOrderStatusTest(unittest.TestCase):
+    """Delayed order status transitions reach the client in order"""
+
+    def _statuses(self, frames) -> list:
+        # Frames are length-prefixed; the status follows message id and order id
+        return [frame[4:].split(b'\x00')[2].decode() for frame in frames]
+
+    def test_cancel_before_ack_keeps_submitted(self):
+        async def scenario():
+            writer = FakeWriter()
+            config = _make_config()
+            config['simulation']['order_ack_delay'] = 0.05
+            handler = ClientHandler(
+                client_id=1, reader=None, writer=writer, server=None, config=config
+            )
+            handler._writer_task = asyncio.create_task(handler._writer_loop())
+
+            # Same transitions as _handle_place_order, cancelled within the delay
+            await handler._send_unfilled_order_status(5, 'PendingSubmit')
+            await handler._send_delayed_order_status(5, 'Submitted')
+            await handler._handle_cancel_order(CancelOrderMsg(5))
+            await asyncio.sleep(0.1)
+
+            self.assertEqual(
+                self._statuses(writer.written),
+                ['PendingSubmit', 'Submitted', 'PendingCancel', 'Cancelled']
+            )
+            self.assertEqual(handler._pending_order_status, {})
+            await handler.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
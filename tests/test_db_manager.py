@@ -0,0 +1,335 @@
+"""
+Tests for DatabaseManager market data buffering and schema upgrades
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+import duckdb
+
+from ib_simulator.database.db_manager import DatabaseManager
+
+
+def _make_config(db_path: str, flush_interval: float = 0.1) -> dict:
+    """Smallest config DatabaseManager needs"""
+    return {
+        'database': {
+            'path': db_path,
+            'market_data_batch_size': 500,
+            'market_data_flush_interval': flush_interval,
+        },
+        'authentication': {'accounts': []},
+        'market': {'symbols': ['AAPL']},
+    }
+
+
+class MarketDataFlushTest(unittest.TestCase):
+    """Buffered ticks reach the market_data table"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, 'test.db')
+        self.db = DatabaseManager(_make_config(self.db_path))
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp.cleanup()
+
+    def _ticks(self):
+        return self.db.connection.execute(
+            "SELECT id, con_id, symbol, bid_price, ask_size, volume "
+            "FROM market_data ORDER BY id"
+        ).fetchall()
+
+    def test_flush_writes_buffered_ticks(self):
+        for i in range(3):
+            self.db.update_market_data(1000, 'AAPL', {
+                'bid': 100.0 + i, 'ask_size': 10 * i, 'volume': 1000 + i
+            })
+        self.assertEqual(self._ticks(), [])
+
+        self.db.flush_market_data()
+
+        self.assertEqual(self._ticks(), [
+            (1, 1000, 'AAPL', 100.0, 0, 1000),
+            (2, 1000, 'AAPL', 101.0, 10, 1001),
+            (3, 1000, 'AAPL', 102.0, 20, 1002),
+        ])
+
+    def test_ids_continue_after_reopen(self):
+        self.db.update_market_data(1000, 'AAPL', {'bid': 1.0})
+        self.db.close()
+
+        self.db = DatabaseManager(_make_config(self.db_path))
+        self.db.update_market_data(1000, 'AAPL', {'bid': 2.0})
+        self.db.flush_market_data()
+
+        self.assertEqual([row[0] for row in self._ticks()], [1, 2])
+
+    def test_bad_tick_does_not_drop_batch(self):
+        self.db.update_market_data(1000, 'AAPL', {'bid': 1.0})
+        self.db.update_market_data(1001, None, {'bid': 2.0})  # symbol is NOT NULL
+        self.db.update_market_data(1002, 'MSFT', {'bid': 3.0})
+
+        self.db.flush_market_data()
+
+        self.assertEqual([row[1:4] for row in self._ticks()], [
+            (1000, 'AAPL', 1.0),
+            (1002, 'MSFT', 3.0),
+        ])
+
+    def test_timer_flushes_tail_of_burst(self):
+        async def burst():
+            self.db.update_market_data(1000, 'AAPL', {'bid': 1.0})
+            self.db.update_market_data(1000, 'AAPL', {'bid': 2.0})
+            await asyncio.sleep(0.3)
+
+        asyncio.run(burst())
+
+        self.assertEqual(len(self._ticks()), 2)
+
+
+# Price tables as created by databases that predate the DOUBLE columns
+_LEGACY_DECIMAL_SQL = """
+CREATE TABLE market_data (
+    id INTEGER PRIMARY KEY,
+    con_id INTEGER NOT NULL,
+    symbol VARCHAR NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    bid_price DECIMAL(20,4),
+    bid_size INTEGER,
+    ask_price DECIMAL(20,4),
+    ask_size INTEGER,
+    last_price DECIMAL(20,4),
+    last_size INTEGER,
+    volume BIGINT,
+    open DECIMAL(20,4),
+    high DECIMAL(20,4),
+    low DECIMAL(20,4),
+    close DECIMAL(20,4),
+    vwap DECIMAL(20,4),
+    UNIQUE(con_id, timestamp)
+);
+CREATE INDEX idx_market_data_symbol ON market_data(symbol, timestamp);
+
+CREATE TABLE historical_data (
+    id INTEGER PRIMARY KEY,
+    con_id INTEGER NOT NULL,
+    symbol VARCHAR NOT NULL,
+    bar_time TIMESTAMP NOT NULL,
+    bar_size VARCHAR NOT NULL,
+    open DECIMAL(20,4) NOT NULL,
+    high DECIMAL(20,4) NOT NULL,
+    low DECIMAL(20,4) NOT NULL,
+    close DECIMAL(20,4) NOT NULL,
+    volume BIGINT,
+    wap DECIMAL(20,4),
+    bar_count INTEGER,
+    UNIQUE(con_id, bar_time, bar_size)
+);
+
+CREATE TABLE accounts (
+    account_id VARCHAR PRIMARY KEY,
+    username VARCHAR NOT NULL,
+    password_hash VARCHAR NOT NULL,
+    account_type VARCHAR NOT NULL CHECK (account_type IN ('LIVE', 'PAPER')),
+    base_currency VARCHAR DEFAULT 'USD',
+    net_liquidation DECIMAL(20,2) NOT NULL,
+    available_funds DECIMAL(20,2) NOT NULL,
+    buying_power DECIMAL(20,2) NOT NULL,
+    gross_position_value DECIMAL(20,2) DEFAULT 0,
+    cash_balance DECIMAL(20,2) NOT NULL,
+    realized_pnl DECIMAL(20,2) DEFAULT 0,
+    unrealized_pnl DECIMAL(20,2) DEFAULT 0,
+    maintenance_margin DECIMAL(20,2) DEFAULT 0,
+    initial_margin DECIMAL(20,2) DEFAULT 0,
+    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE positions (
+    id INTEGER PRIMARY KEY,
+    account_id VARCHAR NOT NULL REFERENCES accounts(account_id),
+    con_id INTEGER NOT NULL,
+    symbol VARCHAR NOT NULL,
+    security_type VARCHAR NOT NULL CHECK (security_type IN ('STK', 'OPT', 'FUT', 'CASH', 'BOND')),
+    currency VARCHAR DEFAULT 'USD',
+    position DECIMAL(20,4) NOT NULL,
+    avg_cost DECIMAL(20,4) NOT NULL,
+    market_price DECIMAL(20,4),
+    market_value DECIMAL(20,2),
+    unrealized_pnl DECIMAL(20,2),
+    realized_pnl DECIMAL(20,2) DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(account_id, con_id)
+);
+CREATE INDEX idx_positions_account ON positions(account_id);
+
+INSERT INTO accounts (account_id, username, password_hash, account_type,
+                      net_liquidation, available_funds, buying_power, cash_balance)
+VALUES ('DU1', 'user', 'hash', 'PAPER', 1000, 1000, 1000, 1000);
+INSERT INTO positions (id, account_id, con_id, symbol, security_type, position,
+                       avg_cost, market_price, market_value)
+VALUES (1, 'DU1', 1000, 'AAPL', 'STK', 10, 95, 100.25, 1002.5);
+INSERT INTO market_data (id, con_id, symbol, timestamp, bid_price, ask_price)
+VALUES (1, 1000, 'AAPL', TIMESTAMP '2024-01-02 09:30:00', 100.25, 100.5);
+INSERT INTO historical_data (id, con_id, symbol, bar_time, bar_size, open, high, low, close)
+VALUES (1, 1000, 'AAPL', TIMESTAMP '2024-01-02 09:30:00', '1 min', 100, 101.5, 99.75, 101);
+"""
+
+# Option ticks kept in their own table, alongside the legacy price tables
+_LEGACY_OPTION_SQL = """
+CREATE TABLE contracts (
+    con_id INTEGER PRIMARY KEY,
+    symbol VARCHAR NOT NULL,
+    security_type VARCHAR NOT NULL,
+    exchange VARCHAR DEFAULT 'SMART',
+    currency VARCHAR DEFAULT 'USD',
+    local_symbol VARCHAR,
+    trading_class VARCHAR,
+    multiplier INTEGER DEFAULT 1,
+    min_tick DECIMAL(10,6) DEFAULT 0.01,
+    price_magnifier INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE option_contracts (
+    con_id INTEGER PRIMARY KEY REFERENCES contracts(con_id),
+    underlying_symbol VARCHAR NOT NULL,
+    underlying_con_id INTEGER,
+    strike DECIMAL(20,4) NOT NULL,
+    expiry DATE NOT NULL,
+    "right" VARCHAR NOT NULL CHECK ("right" IN ('C', 'P')),
+    multiplier INTEGER DEFAULT 100,
+    trading_class VARCHAR,
+    exercise_style VARCHAR DEFAULT 'AMERICAN'
+);
+
+CREATE TABLE option_market_data (
+    id INTEGER PRIMARY KEY,
+    con_id INTEGER NOT NULL REFERENCES option_contracts(con_id),
+    timestamp TIMESTAMP NOT NULL,
+    bid_price DECIMAL(20,4),
+    bid_size INTEGER,
+    ask_price DECIMAL(20,4),
+    ask_size INTEGER,
+    last_price DECIMAL(20,4),
+    last_size INTEGER,
+    volume BIGINT,
+    open_interest INTEGER,
+    implied_volatility DECIMAL(10,6),
+    delta DECIMAL(10,6),
+    gamma DECIMAL(10,6),
+    theta DECIMAL(10,6),
+    vega DECIMAL(10,6),
+    rho DECIMAL(10,6),
+    UNIQUE(con_id, timestamp)
+);
+
+INSERT INTO contracts (con_id, symbol, security_type) VALUES
+    (1000, 'AAPL', 'STK'),
+    (2000, 'AAPL', 'OPT');
+INSERT INTO option_contracts (con_id, underlying_symbol, underlying_con_id, strike, expiry, "right")
+VALUES (2000, 'AAPL', 1000, 150, DATE '2024-01-19', 'C');
+INSERT INTO option_market_data (id, con_id, timestamp, bid_price, ask_price,
+                                open_interest, implied_volatility, delta)
+VALUES
+    (1, 2000, TIMESTAMP '2024-01-02 09:30:00', 2.5, 2.6, 1200, 0.25, 0.5),
+    (2, 2000, TIMESTAMP '2024-01-02 09:31:00', 2.55, 2.65, 1200, 0.255, 0.51);
+"""
+
+
+class SchemaUpgradeTest(unittest.TestCase):
+    """Databases written by older versions are brought up to date on open"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, 'legacy.db')
+        self.db = None
+
+    def tearDown(self):
+        if self.db is not None:
+            self.db.close()
+        self._tmp.cleanup()
+
+    def _create_legacy(self, sql: str):
+        connection = duckdb.connect(self.db_path)
+        connection.execute(sql)
+        connection.close()
+
+    def _reopen(self):
+        if self.db is not None:
+            self.db.close()
+        self.db = DatabaseManager(_make_config(self.db_path))
+
+    def _column_types(self, table: str) -> dict:
+        return dict(self.db.connection.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = ?", (table,)
+        ).fetchall())
+
+    def test_decimal_prices_become_double(self):
+        self._create_legacy(_LEGACY_DECIMAL_SQL)
+
+        # A second startup must find nothing left to convert
+        for _ in range(2):
+            self._reopen()
+
+            market_data = self._column_types('market_data')
+            for column in ('bid_price', 'ask_price', 'last_price', 'open', 'vwap'):
+                self.assertEqual(market_data[column], 'DOUBLE')
+            historical_data = self._column_types('historical_data')
+            for column in ('open', 'high', 'low', 'close', 'wap'):
+                self.assertEqual(historical_data[column], 'DOUBLE')
+            positions = self._column_types('positions')
+            for column in ('market_price', 'market_value'):
+                self.assertEqual(positions[column], 'DOUBLE')
+
+            self.assertEqual(self.db.connection.execute(
+                "SELECT bid_price, ask_price FROM market_data WHERE id = 1"
+            ).fetchall(), [(100.25, 100.5)])
+            self.assertEqual(self.db.connection.execute(
+                "SELECT open, high, low, close FROM historical_data"
+            ).fetchall(), [(100.0, 101.5, 99.75, 101.0)])
+            self.assertEqual(self.db.connection.execute(
+                "SELECT market_price, market_value FROM positions"
+            ).fetchall(), [(100.25, 1002.5)])
+            self.assertEqual(self.db.connection.execute(
+                "SELECT index_name FROM duckdb_indexes() WHERE table_name = 'positions'"
+            ).fetchall(), [('idx_positions_account',)])
+
+    def test_option_market_data_merged_into_market_data(self):
+        self._create_legacy(_LEGACY_DECIMAL_SQL + _LEGACY_OPTION_SQL)
+
+        # A second startup finds the view and must not merge again
+        for _ in range(2):
+            self._reopen()
+
+            self.assertEqual(self.db.connection.execute(
+                "SELECT table_type FROM information_schema.tables "
+                "WHERE table_name = 'option_market_data'"
+            ).fetchall(), [('VIEW',)])
+            self.assertEqual(self.db.connection.execute(
+                "SELECT id, con_id, symbol, bid_price, open_interest, implied_volatility, delta "
+                "FROM market_data ORDER BY id"
+            ).fetchall(), [
+                (1, 1000, 'AAPL', 100.25, None, None, None),
+                (2, 2000, 'AAPL', 2.5, 1200, 0.25, 0.5),
+                (3, 2000, 'AAPL', 2.55, 1200, 0.255, 0.51),
+            ])
+            self.assertEqual(self.db.connection.execute(
+                "SELECT id, ask_price, delta FROM option_market_data ORDER BY id"
+            ).fetchall(), [(2, 2.6, 0.5), (3, 2.65, 0.51)])
+
+        # New ticks are numbered after the merged rows
+        self.db.update_market_data(2000, 'AAPL', {'bid': 2.7})
+        self.db.flush_market_data()
+        self.assertEqual(self.db.connection.execute(
+            "SELECT MAX(id) FROM market_data"
+        ).fetchone()[0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+Tests for IBSimulatorServer config loading and client slots
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from ib_simulator.core.client_handler import ClientHandler
+from ib_simulator.core import server as server_module
+from ib_simulator.core.server import IBSimulatorServer
+
+_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'ib_simulator', 'config.yaml')
+
+
+class FakeWriter:
+    """StreamWriter stand-in for connections that never send anything"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+class ConfigCacheTest(unittest.TestCase):
+    """Parsed config files are reused until the file changes"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self._tmp.name, 'config.yaml')
+        server_module._CONFIG_CACHE.clear()
+        # _load_config does not depend on anything set up in __init__
+        self.server = IBSimulatorServer.__new__(IBSimulatorServer)
+
+    def tearDown(self):
+        server_module._CONFIG_CACHE.clear()
+        self._tmp.cleanup()
+
+    def _write(self, path: str, port: int):
+        with open(path, 'w') as f:
+            yaml.safe_dump({'server': {'host': '127.0.0.1', 'port': port}}, f)
+
+    def _load(self) -> dict:
+        with mock.patch.dict(os.environ):
+            os.environ.pop('IB_SIM_HOST', None)
+            os.environ.pop('IB_SIM_PORT', None)
+            os.environ.pop('IB_SIM_DB_PATH', None)
+            return self.server._load_config(self.config_path)
+
+    def test_rewritten_file_is_read_again(self):
+        self._write(self.config_path, 4001)
+        self.assertEqual(self._load()['server']['port'], 4001)
+        mtime_ns = os.stat(self.config_path).st_mtime_ns
+
+        # Same size, and a timestamp that may not have moved on its own
+        self._write(self.config_path, 4002)
+        os.utime(self.config_path, ns=(mtime_ns, mtime_ns + 1_000_000))
+        self.assertEqual(self._load()['server']['port'], 4002)
+
+    def test_mutating_loaded_config_leaves_cache_intact(self):
+        self._write(self.config_path, 4001)
+        config = self._load()
+        config['server']['port'] = 9999
+        del config['server']['host']
+
+        self.assertEqual(self._load()['server'], {'host': '127.0.0.1', 'port': 4001})
+
+    def test_least_recently_used_file_is_evicted(self):
+        paths = []
+        for i in range(server_module._CONFIG_CACHE_MAX + 1):
+            path = os.path.join(self._tmp.name, f'config{i}.yaml')
+            self._write(path, 4000 + i)
+            paths.append(os.path.abspath(path))
+
+        IBSimulatorServer._read_config_file(paths[0])
+        for path in paths[2:]:
+            IBSimulatorServer._read_config_file(path)
+        # Touching the first file again makes the second the oldest entry
+        IBSimulatorServer._read_config_file(paths[0])
+        IBSimulatorServer._read_config_file(paths[1])
+
+        self.assertEqual(len(server_module._CONFIG_CACHE), server_module._CONFIG_CACHE_MAX)
+        self.assertIn(paths[0], server_module._CONFIG_CACHE)
+        self.assertNotIn(paths[2], server_module._CONFIG_CACHE)
+
+
+class ClientSlotTest(unittest.TestCase):
+    """Connections take the lowest free slot and give it back on exit"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        with open(_CONFIG_PATH, 'r') as f:
+            config = yaml.safe_load(f)
+        config['server']['max_clients'] = 2
+        config['database']['path'] = os.path.join(self._tmp.name, 'test.db')
+
+        config_path = os.path.join(self._tmp.name, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(config, f)
+
+        # IB_SIM_DB_PATH would point the server away from the temp database
+        with mock.patch.dict(os.environ):
+            os.environ.pop('IB_SIM_DB_PATH', None)
+            self.server = IBSimulatorServer(config_path)
+
+        # ClientHandler.handle waits here until the test ends the session
+        self._sessions = {}
+        sessions = self._sessions
+
+        async def handle(handler):
+            result = asyncio.get_running_loop().create_future()
+            sessions[handler.client_id] = result
+            await result
+
+        patcher = mock.patch.object(ClientHandler, 'handle', handle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.db_manager.close()
+        self._tmp.cleanup()
+
+    async def _connect(self):
+        writer = FakeWriter()
+        task = asyncio.ensure_future(self.server.handle_client(None, writer))
+        await asyncio.sleep(0)
+        return task, writer
+
+    async def _end(self, client_id: int, error: Exception = None):
+        session = self._sessions.pop(client_id)
+        if error is None:
+            session.set_result(None)
+        else:
+            session.set_exception(error)
+        await asyncio.sleep(0)
+
+    def test_rejects_when_full(self):
+        async def scenario():
+            await self._connect()
+            await self._connect()
+            self.assertEqual(self.server._active, 0b11)
+
+            task, writer = await self._connect()
+            await asyncio.wait_for(task, 1.0)
+            self.assertTrue(writer.closed)
+            self.assertEqual(sorted(self.server.clients), [1, 2])
+
+            await self._end(1)
+            await self._end(2)
+
+        asyncio.run(scenario())
+
+    def test_slot_released_on_handler_error(self):
+        async def scenario():
+            first, _ = await self._connect()
+            await self._connect()
+
+            await self._end(1, RuntimeError('connection reset'))
+            await asyncio.wait_for(first, 1.0)
+            self.assertEqual(self.server._active, 0b10)
+            self.assertEqual(list(self.server.clients), [2])
+
+            await self._end(2)
+            self.assertEqual(self.server._active, 0)
+            self.assertEqual(self.server._client_slots, [None, None])
+
+        asyncio.run(scenario())
+
+    def test_lowest_free_id_is_reused(self):
+        async def scenario():
+            await self._connect()
+            await self._connect()
+            await self._end(1)
+
+            task, writer = await self._connect()
+            self.assertFalse(writer.closed)
+            self.assertEqual(sorted(self._sessions), [1, 2])
+            self.assertEqual(self.server.clients[1].client_id, 1)
+            self.assertEqual(self.server._active, 0b11)
+
+            await self._end(1)
+            await self._end(2)
+            await asyncio.wait_for(task, 1.0)
+            self.assertEqual(self.server._active, 0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()